@@ -1,29 +1,202 @@
-# binary-search.py
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+# binary-search.py
 # Copyright (c) 2023 JetBloom LLC
 # SPDX-License-Identifier: MPL-2.0
 # from https://www.youtube.com/watch?v=BgLTDT03QtU&t=11m3s
 
-# STATUS: errors:
-# ./binary-search.py: line 7: nums: command not found
-# ./binary-search.py: line 8: target: command not found
-# ./binary-search.py: line 9: syntax error near unexpected token `('
-# ./binary-search.py: line 9: `l, r = 0, len(nums) - 1'
-
-print("binary-search.py")
-nums = [1, 2, 3, 4, 5]
-target = 6
-l, r = 0, len(nums) - 1
-while l <= r:
-    m = (l + 4) // 2
-    if target < nums[m]:
-        r = m - 1
-    elif target > nums[m]:
-        l = m + 1
+"""binary-search.py: find where values belong in a sorted array.
+
+"v002 + lower/upper bound, searchsorted batch, Eytzinger layout, benchmark :binary-search.py"
+STATUS: working
+
+Ways to find where values belong in a sorted array:
+* binary_search(): the loop from the video, fixed to halve (l + r) // 2 so it converges.
+* lower_bound() / upper_bound(): index of the first element >= (or >) x, using built-in bisect.
+* batch_lower_bound(): np.searchsorted() over a whole NumPy array of queries at once,
+  so millions of lookups run in C instead of a Python loop.
+* eytzinger_layout() + eytzinger_lower_bound(): the sorted array rearranged in
+  breadth-first (BFS) order of a binary search tree, as in the Eytzinger family tree numbering.
+  Element k has its children at 2k and 2k+1, so the first levels of every search
+  share the same few cache lines, and each step goes left or right by adding
+  a comparison (0 or 1) instead of branching.
+  eytzinger_batch_lower_bound() runs those steps for all queries at once in NumPy.
+
+USAGE:
+    ./binary-search.py                      # the original example, then a benchmark
+    ./binary-search.py --max-exponent 8     # up to 10^8 elements (about 3 GB of memory)
+"""
+
+# Built-in modules:
+import argparse
+from bisect import bisect_left, bisect_right
+import functools
+import time
+
+# External modules:
+try:
+    import numpy as np
+except Exception as e:
+    print(f"Python module import failed: {e}")
+    print("Please activate your virtual environment:\n  python3 -m venv venv\n  source venv/bin/activate")
+    exit(9)
+
+
+def binary_search(nums, target):
+    """Return the index of target in sorted nums, or None if it is not there."""
+    l, r = 0, len(nums) - 1
+    while l <= r:
+        m = (l + r) // 2
+        if target < nums[m]:
+            r = m - 1
+        elif target > nums[m]:
+            l = m + 1
+        else:
+            return m
+    return None
+
+
+def lower_bound(sorted_values, x):
+    """Index of the first element >= x (len if none): where x would be inserted before equals."""
+    return bisect_left(sorted_values, x)
+
+
+def upper_bound(sorted_values, x):
+    """Index of the first element > x (len if none): where x would be inserted after equals."""
+    return bisect_right(sorted_values, x)
+
+
+def batch_lower_bound(sorted_array, queries):
+    """lower_bound() of every query at once: a NumPy array of indexes."""
+    return np.searchsorted(sorted_array, queries, side="left")
+
+
+def batch_upper_bound(sorted_array, queries):
+    """upper_bound() of every query at once: a NumPy array of indexes."""
+    return np.searchsorted(sorted_array, queries, side="right")
+
+
+def eytzinger_layout(sorted_array):
+    """Return (tree, levels): sorted_array in Eytzinger (BFS) order, for eytzinger_lower_bound().
+
+    tree[1] is the root; tree[k] has children tree[2k] and tree[2k+1]; tree[0] is unused.
+    The tree is made perfect (2**levels - 1 elements) by padding past the end with
+    the largest value of the dtype, which no query is ever greater than.
+    This way every search takes exactly `levels` steps and the leaf it ends at,
+    minus 2**levels, is the lower bound, with no decoding.
+    Built level by level with NumPy slices: level d holds the sorted elements at
+    indexes (2j + 1) * 2**(levels - 1 - d) - 1 for j = 0 .. 2**d - 1.
+    """
+    sorted_array = np.asarray(sorted_array)
+    n = len(sorted_array)
+    levels = max(1, n.bit_length())   # Smallest perfect tree with room for n.
+    size = (1 << levels) - 1
+    if np.issubdtype(sorted_array.dtype, np.integer):
+        pad = np.iinfo(sorted_array.dtype).max
     else:
-        print("m=",m)
-        break
+        pad = np.inf
+    padded = np.full(size, pad, dtype=sorted_array.dtype)
+    padded[:n] = sorted_array
+    tree = np.empty(size + 1, dtype=sorted_array.dtype)
+    tree[0] = pad
+    for depth in range(levels):
+        stride = 1 << (levels - depth)
+        tree[1 << depth:2 << depth] = padded[(stride >> 1) - 1::stride]
+    return tree, levels
+
+
+def eytzinger_lower_bound(tree, levels, x):
+    """lower_bound() of x in an eytzinger_layout() tree, branch-free.
+
+    Each step moves to child 2k (x is not more than tree[k]) or 2k+1 (x is more),
+    by adding the comparison as 0 or 1. Every search takes exactly `levels` steps.
+    """
+    k = 1
+    for _ in range(levels):
+        k = 2 * k + (tree[k] < x)
+    return k - (1 << levels)
+
+
+def eytzinger_batch_lower_bound(tree, levels, queries):
+    """eytzinger_lower_bound() of every query at once, one NumPy step per tree level."""
+    queries = np.asarray(queries)
+    k = np.ones(len(queries), dtype=np.int64)
+    for _ in range(levels):
+        k = 2 * k + (tree[k] < queries)
+    return k - (1 << levels)
+
+
+def timed(func, num_queries):
+    """Return (result of func(), nanoseconds per query), where func() answers num_queries queries."""
+    strt_time = time.perf_counter_ns()
+    result = func()
+    return result, (time.perf_counter_ns() - strt_time) / num_queries
+
+
+def lookup_each(lookup, queries):
+    """Return [lookup(x) for each query x], one Python call per query."""
+    return [lookup(x) for x in queries]
+
+
+def benchmark_size(n, rng, single_queries, batch_queries):
+    """Return ns per query of each method on a sorted array of n random int64s.
+
+    Single lookups run one Python call per query against a zero-copy memoryview of the array.
+    Results are checked against np.searchsorted(). The arrays are freed on return.
+    """
+    sorted_array = np.sort(rng.integers(0, 1 << 62, n, dtype=np.int64))
+    tree, levels = eytzinger_layout(sorted_array)
+    queries = rng.integers(0, 1 << 62, batch_queries, dtype=np.int64)
+    few = queries[:single_queries].tolist()
+    expected = batch_lower_bound(sorted_array, queries)
+
+    results = {
+        "bisect": timed(functools.partial(lookup_each, functools.partial(lower_bound, memoryview(sorted_array)), few),
+                        len(few)),
+        "eytzinger": timed(functools.partial(lookup_each,
+                                             functools.partial(eytzinger_lower_bound, memoryview(tree), levels), few),
+                           len(few)),
+        "searchsorted": timed(functools.partial(batch_lower_bound, sorted_array, queries), len(queries)),
+        "eytz batch": timed(functools.partial(eytzinger_batch_lower_bound, tree, levels, queries), len(queries)),
+    }
+    if (results["bisect"][0] != expected[:len(few)].tolist()
+            or results["eytzinger"][0] != expected[:len(few)].tolist()
+            or not np.array_equal(results["eytz batch"][0], expected)):
+        print(f"*** Lookups disagree with np.searchsorted() for {n:,} elements. Programming error.")
+        exit(9)
+    return {name: ns for name, (_, ns) in results.items()}
+
+
+def benchmark(min_exponent=3, max_exponent=6, single_queries=20_000, batch_queries=1_000_000, seed=1):
+    """Print ns per query of each method on sorted arrays of 10**min_exponent to 10**max_exponent int64s."""
+    rng = np.random.default_rng(seed)
+    print(f"*** ns per query: {min(single_queries, batch_queries):,} single lookups, {batch_queries:,} batch lookups")
+    print(f"{'elements':>13} {'bisect':>9} {'eytzinger':>10} {'searchsorted':>13} {'eytz batch':>11}")
+    for exponent in range(min_exponent, max_exponent + 1):
+        n = 10 ** exponent
+        timings = benchmark_size(n, rng, single_queries, batch_queries)
+        print(f"{n:>13,} {timings['bisect']:>9,.0f} {timings['eytzinger']:>10,.0f}"
+              f" {timings['searchsorted']:>13,.1f} {timings['eytz batch']:>11,.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--min-exponent", type=int, default=3, help="Smallest array is 10 to this power")
+    parser.add_argument("--max-exponent", type=int, default=6,
+                        help="Largest array is 10 to this power (10^8 needs about 3 GB of memory)")
+    parser.add_argument("--queries", type=int, default=1_000_000, help="Queries for the batch lookups")
+    args = parser.parse_args()
+
+    print("binary-search.py")
+    nums = [1, 2, 3, 4, 5]
+    for target in (4, 6):
+        print(f"binary_search({nums}, {target}) =", binary_search(nums, target))
+           # 3, then None as 6 is not in nums.
+    nums = [1, 2, 2, 2, 5]
+    print(f"lower_bound({nums}, 2) = {lower_bound(nums, 2)}, upper_bound = {upper_bound(nums, 2)}")
+       # lower_bound([1, 2, 2, 2, 5], 2) = 1, upper_bound = 4
+
+    benchmark(args.min_exponent, args.max_exponent, batch_queries=args.queries)
 
 """
 https://www.cuantum.tech/app/section/41-divide-and-conquer-algorithms-ecd63b96c8dc4f919456d4a54ea43fb7
@@ -44,4 +217,6 @@ function binary_search(list, item):
             low = mid + 1
 
     return None
-"""
\ No newline at end of file
+
+Eytzinger layout: https://algorithmica.org/en/eytzinger
+"""
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+
+"""dijkstra-bench.py: a benchmark suite for Dijkstra shortest paths.
+
+At https://github.com/wilsonmar/python-samples/blob/main/dijkstra-bench.py
+
+"v001 new grid, erdos_renyi, scale_free, road graphs :dijkstra-bench.py"
+STATUS: working
+
+Benchmark the Dijkstra implementations in this repo against each other
+on synthetic graphs of increasing size:
+* dijkstra1() and dijkstra2() in dijkstras.py, which scan all nodes for the next one: O(V^2)
+* dijkstra_csr() in dijkstras.py, a binary heap (heapq) over CSR typed arrays
+* dijkstra() in dijkstra-yt.py with its IndexedPriorityQueue and LazyPriorityQueue
+
+Graph generators (all undirected, and connected so every node is reachable from node 0):
+* grid: square grid, each node joined to its 4 neighbours
+* erdos_renyi: random pairs of nodes (the G(n, m) variant) plus a chain through all nodes
+* scale_free: Barabasi-Albert preferential attachment, so a few hubs get most edges
+* road: jittered grid points with some streets missing and some diagonals,
+  weighted by straight-line length, like a road map
+
+Each implementation runs --repeat times from node 0 on each graph.
+Distances must agree with dijkstra_csr() or the program stops.
+Reported per run: time (min and median), nodes settled, heap operations,
+and peak memory (from tracemalloc in a separate untimed run),
+written as CSV and plotted on log-log axes per generator.
+
+USAGE:
+    ./dijkstra-bench.py
+    ./dijkstra-bench.py -g grid road -n 1000 10000 100000 -r 5 --csv results.csv --plot results.png
+"""
+
+# Built-in modules:
+import argparse
+import csv
+import importlib.util
+import math
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+# External modules:
+try:
+    import matplotlib.pyplot as plt
+    from matplotlib.ticker import NullFormatter
+except Exception as e:
+    print(f"Python module import failed: {e}")
+    print("Please activate your virtual environment:\n  python3 -m venv venv\n  source venv/bin/activate")
+    exit(9)
+
+
+def load_script(filename, module_name):
+    """Import a script in this folder whose file name is not a valid module name (such as dijkstra-yt.py)."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+dijkstras = load_script("dijkstras.py", "dijkstras")
+dijkstra_yt = load_script("dijkstra-yt.py", "dijkstra_yt")
+dijkstras.SHOW_STEPS = False
+
+
+# Graph generators: each returns a list of (from_node, to_node, weight), both directions of each edge.
+
+def _undirected(best):
+    """Turn {(u, v): weight} with u < v into directed edges both ways."""
+    return [edge for (u, v), weight in best.items() for edge in ((u, v, weight), (v, u, weight))]
+
+
+def _add(best, u, v, weight):
+    """Keep the lighter of parallel edges, as dict graphs can only hold one."""
+    if u != v:
+        key = (min(u, v), max(u, v))
+        best[key] = min(weight, best.get(key, math.inf))
+
+
+def grid_edges(num_nodes, rng):
+    """Return (nodes, edges) of a square grid with about num_nodes nodes, each joined to its 4 neighbours."""
+    side = max(2, math.isqrt(num_nodes))
+    best = {}
+    for row in range(side):
+        for column in range(side):
+            node = row * side + column
+            if column + 1 < side:
+                _add(best, node, node + 1, rng.uniform(1.0, 10.0))
+            if row + 1 < side:
+                _add(best, node, node + side, rng.uniform(1.0, 10.0))
+    return side * side, _undirected(best)
+
+
+def erdos_renyi_edges(num_nodes, rng, average_degree=4):
+    """Return (nodes, edges) of a chain of num_nodes plus random edges up to average_degree per node."""
+    best = {}
+    for node in range(num_nodes - 1):   # The chain keeps every node reachable.
+        _add(best, node, node + 1, rng.uniform(1.0, 10.0))
+    for _ in range(num_nodes * average_degree // 2):
+        _add(best, rng.randrange(num_nodes), rng.randrange(num_nodes), rng.uniform(1.0, 10.0))
+    return num_nodes, _undirected(best)
+
+
+def scale_free_edges(num_nodes, rng, edges_per_node=2):
+    """Return (nodes, edges) grown by preferential attachment (Barabási-Albert), so a few hubs have most edges."""
+    best = {}
+    repeated = []   # Each node appears once per edge it has, so picking from it favours hubs.
+    for u in range(edges_per_node + 1):
+        for v in range(u + 1, edges_per_node + 1):
+            _add(best, u, v, rng.uniform(1.0, 10.0))
+            repeated += [u, v]
+    for node in range(edges_per_node + 1, num_nodes):
+        chosen = set()
+        while len(chosen) < edges_per_node:
+            chosen.add(rng.choice(repeated))
+        for target in chosen:
+            _add(best, node, target, rng.uniform(1.0, 10.0))
+            repeated += [node, target]
+    return max(num_nodes, edges_per_node + 1), _undirected(best)
+
+
+def road_edges(num_nodes, rng, missing=0.4, diagonals=0.2):
+    """Return (nodes, edges) of a jittered grid with some streets missing and some diagonals, weighted by length."""
+    side = max(2, math.isqrt(num_nodes))
+    points = [(column + rng.uniform(-0.3, 0.3), row + rng.uniform(-0.3, 0.3))
+              for row in range(side) for column in range(side)]
+    best = {}
+
+    def street(u, v):
+        _add(best, u, v, math.dist(points[u], points[v]) * rng.uniform(1.0, 1.2))
+
+    for row in range(side):
+        for column in range(side):
+            node = row * side + column
+            if column + 1 < side:
+                street(node, node + 1)   # Every east-west street, so each row is connected,
+            if row + 1 < side and (column == 0 or rng.random() > missing):
+                street(node, node + side)   # and rows join at least through column 0.
+            if row + 1 < side and column + 1 < side and rng.random() < diagonals:
+                street(node, node + side + 1)
+    return side * side, _undirected(best)
+
+
+GENERATORS = {
+    "grid": grid_edges,
+    "erdos_renyi": erdos_renyi_edges,
+    "scale_free": scale_free_edges,
+    "road": road_edges,
+}
+
+
+# Each implementation: (prepare(num_nodes, edges), run(prepared) -> (distances list, settled, heap_ops), most nodes)
+
+def prepare_dict(num_nodes, edges):
+    """Return (num_nodes, {node: {neighbour: weight}}) as dijkstra1() and dijkstra2() take."""
+    graph = {node: {} for node in range(num_nodes)}
+    for u, v, weight in edges:
+        graph[u][v] = weight
+    return num_nodes, graph
+
+
+def run_dijkstra1(prepared):
+    """Run dijkstras.dijkstra1() from node 0 on a prepare_dict() graph."""
+    num_nodes, graph = prepared
+    visited = dijkstras.dijkstra1(0, tuple(range(num_nodes)), graph)
+    return [visited.get(node, math.inf) for node in range(num_nodes)], len(visited), None
+
+
+def run_dijkstra2(prepared):
+    """Run dijkstras.dijkstra2() from node 0 on a prepare_dict() graph."""
+    num_nodes, graph = prepared
+    shortest = dijkstras.dijkstra2(graph, 0, num_nodes - 1)
+    distances = [math.inf if shortest[node] >= 9999999 else shortest[node] for node in range(num_nodes)]
+    return distances, num_nodes, None   # Every node is picked once by its scan.
+
+
+def prepare_csr(num_nodes, edges):
+    """Return a dijkstras.CSRGraph of the edges."""
+    return dijkstras.CSRGraph.from_edges(num_nodes, edges)
+
+
+def run_dijkstra_csr(csr):
+    """Run dijkstras.dijkstra_csr() from node 0 on a prepare_csr() graph."""
+    stats = {}
+    distances, _ = dijkstras.dijkstra_csr(csr, 0, stats=stats)
+    return list(distances), stats["settled"], stats["heap_ops"]
+
+
+def prepare_yt(num_nodes, edges):
+    """Return (Graph, vertices) of dijkstra-yt.py, with vertices in node order."""
+    vertices = [dijkstra_yt.Vertex(node) for node in range(num_nodes)]
+    adjacency_list = {vertex: [] for vertex in vertices}
+    for u, v, weight in edges:
+        adjacency_list[vertices[u]].append(dijkstra_yt.Edge(weight, vertices[v]))
+    return dijkstra_yt.Graph(adjacency_list), vertices
+
+
+def yt_runner(queue_class):
+    """Return a run function for dijkstra-yt.py dijkstra() with the given priority queue class."""
+    def run(prepared):
+        graph, vertices = prepared
+        stats = {}
+        distances, _ = dijkstra_yt.dijkstra(graph, vertices[0], queue_class=queue_class, stats=stats)
+        return [distances[vertex] for vertex in vertices], stats["settled"], stats["heap_ops"]
+    return run
+
+
+IMPLEMENTATIONS = {   # dijkstra_csr first: the others are checked against it.
+    "dijkstra_csr": (prepare_csr, run_dijkstra_csr, None),
+    "yt_indexed": (prepare_yt, yt_runner(dijkstra_yt.IndexedPriorityQueue), None),
+    "yt_lazy": (prepare_yt, yt_runner(dijkstra_yt.LazyPriorityQueue), None),
+    "dijkstra2": (prepare_dict, run_dijkstra2, 5_000),
+    "dijkstra1": (prepare_dict, run_dijkstra1, 2_000),
+}
+
+RESULT_FIELDS = ["generator", "nodes", "edges", "algorithm", "runs", "min_s", "median_s",
+                 "settled", "heap_ops", "peak_kb", "status"]
+
+
+def peak_memory_kb(run, prepared):
+    """Run once under tracemalloc (untimed, as tracing slows it) and return peak KB allocated."""
+    tracemalloc.start()
+    try:
+        run(prepared)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def benchmark(generators, sizes, algorithms, repeat, seed):
+    """Return a list of result dicts, one per generator x size x algorithm."""
+    results = []
+    for generator in generators:
+        for size in sizes:
+            num_nodes, edges = GENERATORS[generator](size, random.Random(seed))
+            expected = reference = None
+            for algorithm in algorithms:
+                prepare, run, max_nodes = IMPLEMENTATIONS[algorithm]
+                row = {"generator": generator, "nodes": num_nodes, "edges": len(edges),
+                       "algorithm": algorithm, "runs": 0}
+                if max_nodes and num_nodes > max_nodes:
+                    row["status"] = f"skipped over {max_nodes:,} nodes"
+                    results.append(row)
+                    print(f"{generator:<12} {num_nodes:>9,} {algorithm:<13} {row['status']}")
+                    continue
+                prepared = prepare(num_nodes, edges)
+                samples = []
+                for _ in range(repeat):
+                    strt_time = time.perf_counter()
+                    distances, settled, heap_ops = run(prepared)
+                    samples.append(time.perf_counter() - strt_time)
+                if expected is None:   # The first algorithm not skipped is the reference.
+                    expected, reference = distances, algorithm
+                elif any(abs(a - b) > 1e-9 * max(1.0, abs(b)) for a, b in zip(distances, expected)):
+                    print(f"*** {algorithm} distances differ from {reference} on {generator}"
+                          f" with {num_nodes:,} nodes. Programming error.")
+                    exit(9)
+                row.update(runs=repeat, min_s=min(samples), median_s=statistics.median(samples),
+                           settled=settled, heap_ops=heap_ops,
+                           peak_kb=round(peak_memory_kb(run, prepared), 1), status="ok")
+                results.append(row)
+                heap_text = f"{heap_ops:>10,}" if heap_ops is not None else f"{'-':>10}"
+                print(f"{generator:<12} {num_nodes:>9,} {algorithm:<13} {row['median_s']:>10.4f} secs"
+                      f" settled {settled:>9,} heap ops {heap_text} peak {row['peak_kb']:>11,.1f} KB")
+    return results
+
+
+def write_results_csv(results, path):
+    """Write results as CSV with RESULT_FIELDS columns."""
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+    print(f"*** Wrote {len(results)} rows to {path}")
+
+
+def plot_results(results, path):
+    """One log-log panel of median time by nodes per generator, a line per algorithm."""
+    generators = list(dict.fromkeys(row["generator"] for row in results))
+    fig, axes = plt.subplots(1, len(generators), figsize=(5 * len(generators), 4.5), squeeze=False)
+    for ax, generator in zip(axes[0], generators):
+        rows = [row for row in results if row["generator"] == generator and row["status"] == "ok"]
+        for algorithm in dict.fromkeys(row["algorithm"] for row in rows):
+            points = [(row["nodes"], row["median_s"]) for row in rows if row["algorithm"] == algorithm]
+            ax.plot(*zip(*points), marker="o", label=algorithm)
+        ax.set_xscale("log")
+        ax.set_yscale("log")
+        ax.xaxis.set_minor_formatter(NullFormatter())   # Label only powers of 10.
+        ax.set_title(generator)
+        ax.set_xlabel("nodes")
+        ax.set_ylabel("median seconds")
+        ax.grid(True, which="both", alpha=0.3)
+        ax.legend()
+    fig.tight_layout()
+    fig.savefig(path)
+    print(f"*** Saved plot to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-g", "--generators", nargs="+", choices=GENERATORS, default=list(GENERATORS),
+                        help="Graph generators to run")
+    parser.add_argument("-n", "--nodes", nargs="+", type=int, default=[1_000, 3_000, 10_000, 30_000],
+                        help="Graph sizes (grid-based graphs round down to a square)")
+    parser.add_argument("-a", "--algorithms", nargs="+", choices=IMPLEMENTATIONS, default=list(IMPLEMENTATIONS),
+                        help="Implementations to run; the first not skipped is the reference for distances")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Timed runs of each")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the graph generators")
+    parser.add_argument("--csv", default="dijkstra-bench.csv", help="CSV file of results")
+    parser.add_argument("--plot", default="dijkstra-bench.png", help="Image file of the log-log plot")
+    parser.add_argument("--no-plot", action="store_true", help="Skip the plot")
+    args = parser.parse_args()
+
+    results = benchmark(args.generators, args.nodes, args.algorithms, args.repeat, args.seed)
+    print("*** All implementations agree on distances.")
+    write_results_csv(results, args.csv)
+    if not args.no_plot:
+        plot_results(results, args.plot)
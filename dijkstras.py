@@ -2,10 +2,18 @@
 
 """dijkstras.py at https://github.com/wilsonmar/python-samples/blob/main/dijkstras.py
 
-"v009 + globals, display_tree :dijkstras.py"
+"v013 + SHOW_STEPS, dijkstra2 returns distances, dijkstra_csr stats :dijkstras.py"
 STATUS: Working
 
 This program has a time complexity of O(E*log(V)).
+dijkstra1() and dijkstra2() are kept to compare against dijkstra_csr(),
+which stores the graph as Compressed Sparse Row (CSR) typed arrays
+and picks each next node from a binary heap instead of scanning all nodes.
+distance_matrix() answers "distances from these sources to these targets" in one call,
+returning a NumPy matrix, with the searches spread over worker processes.
+CSRGraph.from_edge_list_file() streams a CSV/TSV edge list into the typed arrays.
+CSRGraph.save_binary() writes them to a file that load_binary() memory-maps
+for near instant startup on graphs of millions of edges.
 Illustrated within python-graphs-1.pptx at https://7451111251303.gumroad.com/l/rsvia
 
 This program compares different alogorithms to calculate the 
@@ -39,19 +47,46 @@ Highest rated videos:
 Generalization of this is Graph handling in Python:
 * https://www.udemy.com/course/data-structures-and-algorithms-in-python-gb/learn/lecture/39778648#overview
 
+USAGE:
+    ./dijkstras.py
+    ./dijkstras.py --matrix 500 --nodes 100000   # time a 500 x 500 distance matrix
+    ./dijkstras.py --load edges.csv --save edges.csrg   # stream a CSV edge list, save as binary
+    ./dijkstras.py --load edges.csrg --start A --goal F  # memory-map the binary file and search
 
 """
-# no imports
+# Built-in modules:
+import argparse
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import csv
+from heapq import heappush, heappop
+import itertools
+import math
+import mmap
+from multiprocessing import shared_memory
+import numbers
+import os
+import random
+import struct
+import time
+
+# External module, only needed by distance_matrix():
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # Define Global:
 SHOW_GRAPH = True
 SHOW_NODES = False
+SHOW_STEPS = True   # Print from inside dijkstra1() and dijkstra2() (turned off for benchmarks).
 
 # Code here do not insert graph data, just read.
 
 def dijkstra1(current, nodes, distances):
     # From Pratik Kinage at https://www.pythonpool.com/dijkstras-algorithm-python/
-    print(f"*** dijkstra1() From Pratik Kinage:")
+    if SHOW_STEPS:
+        print(f"*** dijkstra1() From Pratik Kinage:")
     # and https://www.youtube.com/playlist?list=PL5-M_tYf311Y8R3h81RiZFYnWrBv2kfj6
     # This outputs just the total distance to each node from A. As in:
         # {'A': 0, 'B': 2, 'C': 4, 'D': 6, 'E': 9, 'F': 10}
@@ -82,17 +117,19 @@ def dijkstra1(current, nodes, distances):
         del unvisited[current]
         if not unvisited: break
         candidates = [node for node in unvisited.items() if node[1]]
-        print(sorted(candidates, key = lambda x: x[1]))
+        if SHOW_STEPS:
+            print(sorted(candidates, key = lambda x: x[1]))
         current, currentDistance = sorted(candidates, key = lambda x: x[1])[0]
     return visited
 
 def dijkstra2(graph,start,goal):
     # From Ian Sullivan at https://pastebin.com/3Q9rqGHA
     # described at https://www.youtube.com/watch?v=OrJ004Wid4o
-    print(f"*** dijkstra2() From Ian Sullivan:")
+    if SHOW_STEPS:
+        print(f"*** dijkstra2() From Ian Sullivan:")
     shortest_distance = {}
     predecessor = {}
-    unseenNodes = graph
+    unseenNodes = dict(graph)  # A copy, so pop() below does not empty the caller's graph.
     infinity = 9999999
     path = []
     for node in unseenNodes:
@@ -119,15 +156,422 @@ def dijkstra2(graph,start,goal):
             path.insert(0,currentNode)
             currentNode = predecessor[currentNode]
         except KeyError:
-            print('*** Path not reachable')
+            if SHOW_STEPS:
+                print('*** Path not reachable')
             break
     path.insert(0,start)
-    if shortest_distance[goal] != infinity:
+    if SHOW_STEPS and shortest_distance[goal] != infinity:
         print('*** Shortest distance is ' + str(shortest_distance[goal]), end=" ")
         print('along path ' + str(path))
+    return shortest_distance   # infinity for nodes not reachable.
 
-    # TODO: Print intermediate stage nodes with distances.
-    return
+
+class CSRGraph:
+    """Directed weighted graph stored in Compressed Sparse Row (CSR) typed arrays.
+
+    Edges leaving node u are targets[offsets[u]:offsets[u+1]]
+    with matching weights[offsets[u]:offsets[u+1]].
+    Nodes are numbered 0..num_nodes-1; names (if any) map numbers back to labels.
+    Each edge costs 12 bytes (4-byte target, 8-byte weight) instead of
+    the hundreds of bytes of a dict entry or Edge object,
+    so millions of edges fit in bounded memory.
+    """
+
+    def __init__(self, offsets, targets, weights, names=None):
+        # array or (from load_binary) memoryview of the file:
+        self.offsets = offsets    # 'i': num_nodes + 1 entries
+        self.targets = targets    # 'i': num_edges entries
+        self.weights = weights    # 'd': num_edges entries
+        self.names = names
+        self.node_ids = {name: node for node, name in enumerate(names)} if names else None
+
+    @property
+    def num_nodes(self):
+        """Number of nodes, numbered 0 to num_nodes - 1."""
+        return len(self.offsets) - 1
+
+    @property
+    def num_edges(self):
+        """Number of directed edges."""
+        return len(self.targets)
+
+    @classmethod
+    def from_edge_arrays(cls, num_nodes, sources, targets, weights, names=None):
+        """Build CSR from parallel arrays of edges in any order (a counting sort by source).
+
+        CAUTION: Weights cannot be negative for Dijkstra.
+        """
+        counts = array('i', bytes(4 * (num_nodes + 1)))
+        for source in sources:
+            counts[source + 1] += 1
+        offsets = counts   # Prefix sums turn counts into start offsets:
+        for node in range(num_nodes):
+            offsets[node + 1] += offsets[node]
+        next_slot = array('i', offsets[:-1])
+        csr_targets = array('i', bytes(4 * len(targets)))
+        csr_weights = array('d', bytes(8 * len(weights)))
+        for source, target, weight in zip(sources, targets, weights):
+            if weight < 0:
+                raise ValueError(f"Negative weight {weight} on edge {source}->{target}")
+            slot = next_slot[source]
+            csr_targets[slot] = target
+            csr_weights[slot] = weight
+            next_slot[source] = slot + 1
+        return cls(offsets, csr_targets, csr_weights, names)
+
+    @classmethod
+    def from_edges(cls, num_nodes, edges, names=None):
+        """Build CSR from an iterable of (source, target, weight) node numbers."""
+        sources = array('i')
+        targets = array('i')
+        weights = array('d')
+        for source, target, weight in edges:
+            sources.append(source)
+            targets.append(target)
+            weights.append(weight)
+        return cls.from_edge_arrays(num_nodes, sources, targets, weights, names)
+
+    @classmethod
+    def from_dict(cls, graph):
+        """Build CSR from an adjacency dict like {'A': {'B': 6, 'D': 1}, ...} used below."""
+        names = list(dict.fromkeys([*graph, *(name for neighbours in graph.values() for name in neighbours)]))
+        node_ids = {name: node for node, name in enumerate(names)}
+        edges = ((node_ids[name], node_ids[neighbour], weight)
+                 for name, neighbours in graph.items()
+                 for neighbour, weight in neighbours.items())
+        return cls.from_edges(len(names), edges, names)
+
+    EDGE_CHUNK = 100_000   # Rows read per chunk by from_edge_list_file().
+    FILE_MAGIC = b"CSRG"
+    FILE_VERSION = 1
+    # magic, version, byte order check, num_nodes, num_edges, bytes of names (0 if none):
+    FILE_HEADER = struct.Struct("=4sIIxxxxQQQ")
+    BYTE_ORDER_CHECK = 0x01020304
+
+    @classmethod
+    def from_edge_list_file(cls, path, delimiter=None, has_header=False):
+        """Stream a weighted edge list file of "source,target,weight" rows into CSR.
+
+        delimiter defaults to tab for .tsv files and comma otherwise.
+        Node labels (any text) are numbered in order of first appearance and kept as names.
+        Rows are read EDGE_CHUNK at a time straight into typed arrays,
+        so no object per edge is kept, only one per distinct node label.
+        """
+        if delimiter is None:
+            delimiter = "\t" if path.lower().endswith(".tsv") else ","
+        node_ids = {}
+        sources = array('i')
+        targets = array('i')
+        weights = array('d')
+        with open(path, newline="", encoding="utf-8") as file:
+            reader = csv.reader(file, delimiter=delimiter)
+            if has_header:
+                next(reader, None)
+            while True:
+                rows = list(itertools.islice(reader, cls.EDGE_CHUNK))
+                if not rows:
+                    break
+                for row in rows:
+                    if not row:
+                        continue
+                    sources.append(node_ids.setdefault(row[0], len(node_ids)))
+                    targets.append(node_ids.setdefault(row[1], len(node_ids)))
+                    weights.append(float(row[2]))
+        return cls.from_edge_arrays(len(node_ids), sources, targets, weights, list(node_ids))
+
+    def save_edge_list_file(self, path, delimiter=None):
+        """Write one "source,target,weight" row per edge, using names if any."""
+        if delimiter is None:
+            delimiter = "\t" if path.lower().endswith(".tsv") else ","
+        labels = self.names if self.names else range(self.num_nodes)
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file, delimiter=delimiter)
+            for node in range(self.num_nodes):
+                start, end = self.offsets[node], self.offsets[node + 1]
+                writer.writerows((labels[node], labels[self.targets[edge]], self.weights[edge])
+                                 for edge in range(start, end))
+
+    def save_binary(self, path):
+        """Write the graph as a binary file for load_binary() to memory-map.
+
+        Layout: FILE_HEADER, offsets (int32), targets (int32), padding to 8 bytes,
+        weights (float64), then names as UTF-8 text separated by newlines.
+        Numbers are in this machine's byte order, which load_binary() checks.
+        """
+        names_bytes = "\n".join(self.names).encode("utf-8") if self.names else b""
+        with open(path, "wb") as file:
+            file.write(self.FILE_HEADER.pack(self.FILE_MAGIC, self.FILE_VERSION, self.BYTE_ORDER_CHECK,
+                                             self.num_nodes, self.num_edges, len(names_bytes)))
+            file.write(memoryview(self.offsets).cast('B'))
+            file.write(memoryview(self.targets).cast('B'))
+            file.write(bytes(-file.tell() % 8))
+            file.write(memoryview(self.weights).cast('B'))
+            file.write(names_bytes)
+
+    @classmethod
+    def load_binary(cls, path, load_names=True):
+        """Memory-map a file written by save_binary(); return the graph without copying its arrays.
+
+        offsets, targets, and weights become memoryviews of the file, read from disk
+        by the operating system only as pages are touched, so startup is near instant
+        even for millions of edges. The file stays open while the graph is in use.
+        """
+        with open(path, "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, byte_order, num_nodes, num_edges, names_size = cls.FILE_HEADER.unpack_from(mapped)
+        if magic != cls.FILE_MAGIC or version != cls.FILE_VERSION:
+            raise ValueError(f"{path} is not a version {cls.FILE_VERSION} CSRGraph file")
+        if byte_order != cls.BYTE_ORDER_CHECK:
+            raise ValueError(f"{path} was written on a machine with the other byte order")
+        view = memoryview(mapped)
+        offsets_start = cls.FILE_HEADER.size
+        targets_start = offsets_start + 4 * (num_nodes + 1)
+        weights_start = targets_start + 4 * num_edges
+        weights_start += -weights_start % 8
+        names_start = weights_start + 8 * num_edges
+        names = None
+        if load_names and names_size:
+            names = bytes(view[names_start:names_start + names_size]).decode("utf-8").split("\n")
+        graph = cls(view[offsets_start:targets_start].cast('i'),
+                    view[targets_start:targets_start + 4 * num_edges].cast('i'),
+                    view[weights_start:names_start].cast('d'),
+                    names)
+        graph._mmap = mapped   # Keep the mapping alive as long as the graph.
+        return graph
+
+
+def dijkstra_csr(csr, source, target=None, stats=None):
+    """Dijkstra from node number source using a binary heap with lazy deletion.
+
+    Instead of decreasing a key inside the heap, a shorter distance pushes a new entry
+    and older (stale) entries are skipped when popped. The caller's graph is not changed.
+    Stops early once target (if given) is settled.
+    Returns (distances, predecessors): array('d') with math.inf for unreachable nodes,
+    and array('i') with -1 for the source and unreachable nodes.
+    If a stats dict is given, stats["settled"] is set to the number of nodes settled
+    and stats["heap_ops"] to the number of heappush and heappop calls.
+    """
+    offsets, targets, weights = csr.offsets, csr.targets, csr.weights
+    distances = array('d', [math.inf]) * csr.num_nodes
+    predecessors = array('i', [-1]) * csr.num_nodes
+    distances[source] = 0.0
+    heap = [(0.0, source)]
+    settled = pushes = pops = 0
+    while heap:
+        distance, node = heappop(heap)
+        pops += 1
+        if distance > distances[node]:
+            continue   # Stale entry: node was already settled with a shorter distance.
+        settled += 1
+        if node == target:
+            break
+        for edge in range(offsets[node], offsets[node + 1]):
+            neighbour = targets[edge]
+            new_distance = distance + weights[edge]
+            if new_distance < distances[neighbour]:
+                distances[neighbour] = new_distance
+                predecessors[neighbour] = node
+                heappush(heap, (new_distance, neighbour))
+                pushes += 1
+    if stats is not None:
+        stats["settled"] = settled
+        stats["heap_ops"] = pushes + 1 + pops   # + 1 for the source put in the heap at the start.
+    return distances, predecessors
+
+
+def csr_path(predecessors, source, target):
+    """Return the list of node numbers from source to target, or [] if not reachable."""
+    if source != target and predecessors[target] == -1:
+        return []
+    path = [target]
+    while path[-1] != source:
+        path.append(predecessors[path[-1]])
+    return path[::-1]
+
+
+def show_dijkstra_csr(graph, start, goal):
+    """Print the shortest distance and path found by dijkstra_csr() on a dict graph."""
+    csr = CSRGraph.from_dict(graph)
+    distances, predecessors = dijkstra_csr(csr, csr.node_ids[start])
+    goal_id = csr.node_ids[goal]
+    path = [csr.names[node] for node in csr_path(predecessors, csr.node_ids[start], goal_id)]
+    print(f"*** dijkstra_csr(): Shortest distance is {distances[goal_id]} along path {path}")
+
+
+def distances_to_targets(csr, source, targets):
+    """Return array('d') of distances from source to each of targets (math.inf if unreachable).
+
+    Like dijkstra_csr(), but stops as soon as every one of targets is settled
+    instead of exploring the rest of the graph.
+    """
+    offsets, edge_targets, weights = csr.offsets, csr.targets, csr.weights
+    distances = {source: 0.0}
+    remaining = set(targets)
+    heap = [(0.0, source)]
+    while heap and remaining:
+        distance, node = heappop(heap)
+        if distance > distances[node]:
+            continue   # Stale entry.
+        remaining.discard(node)
+        for edge in range(offsets[node], offsets[node + 1]):
+            neighbour = edge_targets[edge]
+            new_distance = distance + weights[edge]
+            if new_distance < distances.get(neighbour, math.inf):
+                distances[neighbour] = new_distance
+                heappush(heap, (new_distance, neighbour))
+    return array('d', [distances.get(target, math.inf) for target in targets])
+
+
+# Within each worker process of distance_matrix() (set by _attach_shared_csr):
+_worker_csr = None
+_worker_matrix = None
+_worker_blocks = []
+
+
+def _attach_shared_csr(graph_name, num_nodes, num_edges, matrix_name, num_targets):
+    """Attach the shared graph and result matrix in each worker process, without copying them."""
+    global _worker_csr, _worker_matrix, _worker_blocks
+    graph_block = shared_memory.SharedMemory(name=graph_name)
+    matrix_block = shared_memory.SharedMemory(name=matrix_name)
+    _worker_blocks = [graph_block, matrix_block]   # Keep the blocks open while views exist.
+    offsets_end = 4 * (num_nodes + 1)
+    targets_end = offsets_end + 4 * num_edges
+    weights_start = -(-targets_end // 8) * 8   # Align the 8-byte weights.
+    buf = graph_block.buf
+    _worker_csr = CSRGraph(buf[:offsets_end].cast('i'),
+                           buf[offsets_end:targets_end].cast('i'),
+                           buf[weights_start:weights_start + 8 * num_edges].cast('d'))
+    _worker_matrix = (matrix_block.buf.cast('d'), num_targets)
+
+
+def _fill_matrix_rows(first_row, sources, targets):
+    """Worker task: write the distance rows of sources into the shared matrix from first_row on."""
+    matrix, num_targets = _worker_matrix
+    for row, source in enumerate(sources, start=first_row):
+        matrix[row * num_targets:(row + 1) * num_targets] = distances_to_targets(_worker_csr, source, targets)
+    return len(sources)
+
+
+def _node_number(csr, node):
+    """Return the node number of node, given as a number (int or NumPy integer) or as one of csr.names."""
+    return int(node) if isinstance(node, numbers.Integral) else csr.node_ids[node]
+
+
+def distance_matrix(csr, sources, targets, num_procs=None):
+    """Return a NumPy float64 matrix of shortest distances, one row per source, one column per target.
+
+    Sources and targets are node numbers or names. Unreachable targets are np.inf.
+    Each search stops once all targets are settled.
+    With more than one process, the graph is copied once into a read-only shared memory block
+    and sources are shared out across a pool of worker processes (not limited by the GIL),
+    which write their rows straight into a shared result matrix.
+    Only node numbers are pickled, never the graph or distances.
+    """
+    if np is None:
+        raise ImportError("distance_matrix() needs numpy: pip install numpy")
+    sources = [_node_number(csr, node) for node in sources]
+    targets = [_node_number(csr, node) for node in targets]
+    if num_procs is None:
+        num_procs = os.cpu_count() or 1
+    num_procs = max(1, min(num_procs, len(sources)))
+    if num_procs == 1:
+        return np.array([distances_to_targets(csr, source, targets) for source in sources],
+                        dtype=np.float64).reshape(len(sources), len(targets))
+
+    offsets_end = 4 * (csr.num_nodes + 1)
+    targets_end = offsets_end + 4 * csr.num_edges
+    weights_start = -(-targets_end // 8) * 8
+    graph_block = shared_memory.SharedMemory(create=True, size=max(1, weights_start + 8 * csr.num_edges))
+    matrix_block = shared_memory.SharedMemory(create=True, size=max(1, 8 * len(sources) * len(targets)))
+    try:
+        buf = graph_block.buf
+        buf[:offsets_end] = memoryview(csr.offsets).cast('B')
+        buf[offsets_end:targets_end] = memoryview(csr.targets).cast('B')
+        buf[weights_start:weights_start + 8 * csr.num_edges] = memoryview(csr.weights).cast('B')
+        del buf
+
+        # Several chunks per worker, so a worker given far-away sources does not hold up the rest:
+        chunk_size = max(1, len(sources) // (4 * num_procs))
+        with ProcessPoolExecutor(max_workers=num_procs, initializer=_attach_shared_csr,
+                                 initargs=(graph_block.name, csr.num_nodes, csr.num_edges,
+                                           matrix_block.name, len(targets))) as pool:
+            futures = [pool.submit(_fill_matrix_rows, first_row, sources[first_row:first_row + chunk_size], targets)
+                       for first_row in range(0, len(sources), chunk_size)]
+            for future in futures:
+                future.result()   # Raises here any exception from a worker.
+        matrix = np.ndarray((len(sources), len(targets)), dtype=np.float64, buffer=matrix_block.buf).copy()
+    finally:
+        graph_block.close()
+        graph_block.unlink()
+        matrix_block.close()
+        matrix_block.unlink()
+    return matrix
+
+
+def random_csr(num_nodes, edges_per_node=4, seed=None):
+    """Return a CSRGraph with random directed edges of weight 1.0 to 10.0.
+
+    Each node also has an edge to the next one, so every node is reachable from node 0.
+    """
+    rng = random.Random(seed)
+    sources = array('i')
+    targets = array('i')
+    for node in range(num_nodes):
+        for _ in range(edges_per_node - 1):
+            sources.append(node)
+            targets.append(rng.randrange(num_nodes))
+        if node + 1 < num_nodes:
+            sources.append(node)
+            targets.append(node + 1)
+    weights = array('d', [rng.uniform(1.0, 10.0) for _ in sources])
+    return CSRGraph.from_edge_arrays(num_nodes, sources, targets, weights)
+
+
+def benchmark_distance_matrix(num_sources, num_nodes=100_000, num_procs=None, seed=1):
+    """Time distance_matrix() on a random graph with 1 process and with num_procs; check they agree."""
+    csr = random_csr(num_nodes, seed=seed)
+    rng = random.Random(seed)
+    sources = rng.sample(range(num_nodes), num_sources)
+    targets = rng.sample(range(num_nodes), num_sources)
+    print(f"*** {num_sources} x {num_sources} distance matrix on {num_nodes:,} nodes, {csr.num_edges:,} edges")
+    results = []
+    for procs in dict.fromkeys([1, num_procs or os.cpu_count() or 1]):
+        strt_time = time.perf_counter()
+        results.append(distance_matrix(csr, sources, targets, num_procs=procs))
+        print(f"{procs:>3} processes: {time.perf_counter() - strt_time:>9.3f} secs")
+    if not np.array_equal(results[0], results[-1]):
+        print("*** Matrices differ between process counts. Programming error.")
+        exit(9)
+    print(f"*** Matrix checked against {len(results)} run(s); mean distance {results[0].mean():.3f}")
+
+
+def load_and_search(path, save_path=None, start=None, goal=None):
+    """Load a graph file, optionally save it as binary, and run dijkstra_csr() from start."""
+    strt_time = time.perf_counter()
+    if path.endswith(".csrg"):
+        csr = CSRGraph.load_binary(path)
+    else:
+        csr = CSRGraph.from_edge_list_file(path)
+    print(f"*** Loaded {csr.num_nodes:,} nodes, {csr.num_edges:,} edges from {path}"
+          f" in {time.perf_counter() - strt_time:.3f} secs")
+    if save_path:
+        strt_time = time.perf_counter()
+        csr.save_binary(save_path)
+        print(f"*** Saved {save_path} ({os.path.getsize(save_path):,} bytes)"
+              f" in {time.perf_counter() - strt_time:.3f} secs")
+    if start is not None:
+        source = _node_number(csr, start) if csr.names else int(start)
+        target = None
+        if goal is not None:
+            target = _node_number(csr, goal) if csr.names else int(goal)
+        strt_time = time.perf_counter()
+        distances, predecessors = dijkstra_csr(csr, source, target)
+        print(f"*** dijkstra_csr() from {start} in {time.perf_counter() - strt_time:.3f} secs")
+        if target is not None:
+            path = csr_path(predecessors, source, target)
+            if csr.names:
+                path = [csr.names[node] for node in path]
+            print(f"*** Shortest distance is {distances[target]} along path {path}")
 
 
 def display_tree(dictionary, indent=""):
@@ -143,6 +587,23 @@ def display_tree(dictionary, indent=""):
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--matrix", type=int, metavar="SOURCES",
+                        help="Time a SOURCES x SOURCES distance_matrix() on a random graph")
+    parser.add_argument("--nodes", type=int, default=100_000, help="Nodes in the --matrix random graph")
+    parser.add_argument("-p", "--processes", type=int, help="Worker processes for --matrix (default: all CPUs)")
+    parser.add_argument("--load", metavar="FILE",
+                        help="Load a graph from a .csv/.tsv edge list or a .csrg binary file")
+    parser.add_argument("--save", metavar="FILE.csrg", help="Save the --load graph as a binary file")
+    parser.add_argument("--start", help="With --load: node name to find shortest distances from")
+    parser.add_argument("--goal", help="With --load and --start: node name to show the path to")
+    args = parser.parse_args()
+    if args.load:
+        load_and_search(args.load, args.save, args.start, args.goal)
+        exit(0)
+    if args.matrix:
+        benchmark_distance_matrix(args.matrix, args.nodes, args.processes)
+        exit(0)
 
     # TODO: Define these outside the program from a file?
 
@@ -179,9 +640,10 @@ if __name__ == "__main__":
     if SHOW_NODES == True:
         print(dijkstra1(start, nodes, graph))
         # {'A': 0, 'D': 1, 'E': 2, 'B': 4, 'C': 7}
-    print(dijkstra2(graph,start,goal))
+    dijkstra2(graph,start,goal)
         # *** dijkstra2() From Ian Sullivan:
         # Shortest distance is 2 along path ['A', 'D', 'E']
+    show_dijkstra_csr(graph, start, goal)
 
     print(" ")
 
@@ -212,10 +674,11 @@ if __name__ == "__main__":
         # [('E', 9)]
         # return visited: A C E F = 10
         # {'A': 0, 'B': 2, 'C': 4, 'D': 6, 'E': 9, 'F': 10}
-    print(dijkstra2(graph,start,goal))
+    dijkstra2(graph,start,goal)
         # Shortest distance is 10
         # And the path is ['A', 'C', 'E', 'F']
-        # None
+    show_dijkstra_csr(graph, start, goal)
+        # *** dijkstra_csr(): Shortest distance is 10.0 along path ['A', 'C', 'E', 'F']
 
     # TODO: Illustrate visually in a GUI?
 
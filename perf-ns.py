@@ -4,18 +4,23 @@
 An example of obtaining timings in nanosecond-level resolution.
 
 CURRENT STATUS: WORKING on macOS M2 14.5 (23F79) using Python 3.12.7.
-git commit -m"v003 + program level timer :perf-ns.py"
+git commit -m"v004 + same task timed by perf_profiler.py spans :perf-ns.py"
 
 The t_ns_duration is the difference between timestamps obtained by calling
 time.perf_counter_ns() which returns a monotonic time that only increases. 
 However, time.time() can decrease, such as when the system clock is synchronised
 with an external NTP server.
+
+To time many calls or nested functions without this arithmetic and a print per call,
+import perf_profiler.py (a module built on these timestamps), as at the bottom here.
 """
 
 # import time
 from time import perf_counter_ns
 import time  # for sleep.
 
+from perf_profiler import profiler, span   # perf_profiler.py in this folder.
+
 # GLOBALS:
 SLEEP_SECS = 0.5
 
@@ -42,6 +47,14 @@ print(f"*** PERF: Task \"{TASK_NAME}\" took: {t_ns_duration_secs:,.3f} secs"
 # PROTIP: Different levels of precision:
 # OUTPUT: *** PERF: Task "Sleep" took: 0.505 secs, 504.89 millisecs-ms, 504,886.8 microsecsonds-µs, 504,886,792 nano-secs
 
+# The same task as a span of perf_profiler.py, which adds up calls and nested time in memory:
+with span("Tasks"):
+    for _ in range(3):
+        with span(TASK_NAME):
+            time.sleep(SLEEP_SECS / 10)
+print(profiler.report())
+# OUTPUT (with columns per span): Tasks 1 call of ~150 ms, Sleep 3 calls of ~50 ms each.
+
 # STEP: Calculate the execution time:
 end_time = time.time()
 execution_time = end_time - start_time
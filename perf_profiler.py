@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+
+"""perf_profiler.py: a low-overhead timing profiler for nested spans.
+
+At https://github.com/wilsonmar/python-samples/blob/main/perf_profiler.py
+Importable by any script in this repo (hence the underscore instead of a dash in its file name).
+
+"v001 new spans, inclusive/exclusive, histograms, Chrome trace, collapsed stacks :perf_profiler.py"
+STATUS: working
+
+Built on the time.perf_counter_ns() timestamps of perf-ns.py, but instead of
+subtracting and printing on every call (which costs more than short calls being measured),
+each span adds to counters in memory and results are reported once at the end:
+
+    from perf_profiler import profile, span, profiler
+
+    @profile
+    def load(path): ...
+
+    with span("parse"):
+        ...
+    print(profiler.report())
+    profiler.write_chrome_trace("trace.json")     # open in chrome://tracing or https://ui.perfetto.dev
+    profiler.write_collapsed_stacks("stacks.txt")  # input to flamegraph.pl or https://www.speedscope.app
+
+For each span name, the profiler keeps:
+* calls
+* inclusive time: from start to end of the span, including spans nested within it.
+  For a recursive function only the outermost call is added, so nested calls are not counted twice.
+* exclusive (self) time: inclusive time minus the time of the spans directly within it.
+* a histogram of inclusive times in power-of-2 nanosecond buckets, for percentiles.
+Collapsed stacks add up exclusive time per stack path ("main;load;parse").
+Chrome trace events (one per span) are kept only with Profiler(trace=True),
+up to max_events, as they take memory per call.
+Open spans are tracked in a contextvars.ContextVar, so each thread and each asyncio task
+has its own chain of them: coroutines running at once (asyncio.gather) each nest under
+the span that started them, not under one another. Time covered by children that ran
+at once is subtracted from their parent's exclusive time only once.
+
+USAGE:
+    ./perf_profiler.py   # profile a small example and print the report
+"""
+
+# Built-in modules:
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+from time import perf_counter_ns
+
+HISTOGRAM_BUCKETS = 64   # Bucket b holds times of b bits: from 2**(b-1) to 2**b - 1 nanoseconds.
+
+
+class SpanStats:
+    """Counters of all spans with one name."""
+
+    __slots__ = ("name", "calls", "inclusive_ns", "exclusive_ns", "min_ns", "max_ns", "histogram")
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.inclusive_ns = 0
+        self.exclusive_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+
+    def percentile_ns(self, percent):
+        """Estimate the percent-th percentile of inclusive time: the upper edge of its histogram bucket."""
+        if not self.calls:
+            return 0
+        rank = percent / 100 * self.calls
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if seen >= rank and count:
+                return min((1 << bucket) - 1, self.max_ns)
+        return self.max_ns
+
+
+class _Span:
+    """A context manager for one timed span; made by Profiler.span()."""
+
+    __slots__ = ("profiler", "name", "start_ns", "parent", "path", "children", "token")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        current = self.profiler._current
+        self.parent = parent = current.get()
+        self.path = parent.path + (self.name,) if parent is not None else (self.name,)
+        self.children = []   # (start_ns, end_ns) of the spans directly within this one.
+        self.token = current.set(self)
+        self.start_ns = perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end_ns = perf_counter_ns()
+        self.profiler._current.reset(self.token)
+        self.profiler._record(self, end_ns)
+        return False
+
+
+class _NullSpan:
+    """Stands in for _Span while the profiler is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Profiler:
+    """Collects nested spans from any number of threads into per-name SpanStats."""
+
+    def __init__(self, enabled=True, trace=False, max_events=1_000_000):
+        self.enabled = enabled
+        self.trace = trace
+        self.max_events = max_events
+        # The innermost open _Span of the running thread or asyncio task:
+        self._current = contextvars.ContextVar(f"perf_profiler_span_{id(self)}", default=None)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget all recorded spans (spans open now are still recorded when they end)."""
+        with self._lock:
+            self.stats = {}       # name -> SpanStats
+            self.stacks = {}      # (outermost name, ..., name) -> exclusive ns
+            self.events = []      # Chrome trace "complete" events, if trace
+            self.dropped_events = 0
+            self.origin_ns = perf_counter_ns()
+
+    def span(self, name):
+        """Return a context manager that records the time spent in its with block as name."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def profile(self, func=None, *, name=None):
+        """Decorate a function (or `async def` coroutine function) to record each call as a span.
+
+        Use as @profile or @profile(name="label"); the name defaults to the function's qualname.
+        """
+        if func is None:
+            return functools.partial(self.profile, name=name)
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with self.span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def _record(self, span, end_ns):
+        inclusive_ns = end_ns - span.start_ns
+        child_ns = 0
+        covered_to = span.start_ns
+        for child_start, child_end in sorted(span.children):   # Overlapping children count once.
+            child_ns += max(child_end - max(child_start, covered_to), 0)
+            covered_to = max(covered_to, child_end)
+        exclusive_ns = inclusive_ns - child_ns
+        parent = span.parent
+        if parent is not None:
+            parent.children.append((span.start_ns, end_ns))
+        # Outermost of a recursion: its time includes the nested calls.
+        outermost = parent is None or span.name not in parent.path
+        with self._lock:
+            stats = self.stats.get(span.name)
+            if stats is None:
+                stats = self.stats[span.name] = SpanStats(span.name)
+            stats.calls += 1
+            if outermost:
+                stats.inclusive_ns += inclusive_ns
+            stats.exclusive_ns += exclusive_ns
+            if stats.min_ns is None or inclusive_ns < stats.min_ns:
+                stats.min_ns = inclusive_ns
+            if inclusive_ns > stats.max_ns:
+                stats.max_ns = inclusive_ns
+            stats.histogram[min(inclusive_ns.bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+            self.stacks[span.path] = self.stacks.get(span.path, 0) + exclusive_ns
+            if self.trace:
+                if len(self.events) < self.max_events:
+                    self.events.append((span.name, span.start_ns, inclusive_ns, threading.get_ident()))
+                else:
+                    self.dropped_events += 1
+
+    def report(self, sort_by="inclusive_ns", limit=None):
+        """Return a text table of SpanStats, largest sort_by first; "self µs" is mean exclusive time."""
+        rows = sorted(self.stats.values(), key=lambda stats: getattr(stats, sort_by), reverse=True)
+        lines = [f"{'span':<32} {'calls':>9} {'incl ms':>11} {'excl ms':>11} {'self µs':>10}"
+                 f" {'p50 µs':>9} {'p99 µs':>9} {'max µs':>10}"]
+        for stats in rows[:limit]:
+            mean_ns = stats.exclusive_ns / stats.calls if stats.calls else 0
+            lines.append(f"{stats.name[:32]:<32} {stats.calls:>9,} {stats.inclusive_ns / 1e6:>11,.3f}"
+                         f" {stats.exclusive_ns / 1e6:>11,.3f} {mean_ns / 1e3:>10,.1f}"
+                         f" {stats.percentile_ns(50) / 1e3:>9,.1f} {stats.percentile_ns(99) / 1e3:>9,.1f}"
+                         f" {stats.max_ns / 1e3:>10,.1f}")
+        if self.dropped_events:
+            lines.append(f"*** {self.dropped_events:,} trace events dropped over max_events={self.max_events:,}")
+        return "\n".join(lines)
+
+    def write_chrome_trace(self, path):
+        """Write recorded events (needs trace=True) as Chrome trace-event JSON."""
+        pid = os.getpid()
+        with self._lock:
+            events = [{"name": name, "ph": "X", "pid": pid, "tid": tid,
+                       "ts": (start_ns - self.origin_ns) / 1000, "dur": duration_ns / 1000}
+                      for name, start_ns, duration_ns, tid in self.events]
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ns"}, file)
+
+    def write_collapsed_stacks(self, path):
+        """Write one "outer;inner;name microseconds" line per stack path, for flame graphs."""
+        with self._lock:
+            lines = [f"{';'.join(stack)} {exclusive_ns // 1000}" for stack, exclusive_ns in self.stacks.items()]
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+
+
+# One profiler shared by every script that imports this module:
+profiler = Profiler()
+span = profiler.span
+profile = profiler.profile
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    profiler.trace = True
+
+    @profile
+    def fib(n):
+        """Return F(n) by naive recursion, to show nested spans of one name."""
+        return n if n <= 1 else fib(n - 1) + fib(n - 2)
+
+    @profile
+    def sleep_a_little():
+        """Sleep 10 ms."""
+        time.sleep(0.01)
+
+    @profile(name="main")
+    def main():
+        """Run the example spans."""
+        for _ in range(5):
+            sleep_a_little()
+        with span("fib(18)"):
+            fib(18)
+
+    main()
+    print(profiler.report())
+    trace_path = os.path.join(tempfile.gettempdir(), "perf_profiler-trace.json")
+    stacks_path = os.path.join(tempfile.gettempdir(), "perf_profiler-stacks.txt")
+    profiler.write_chrome_trace(trace_path)
+    profiler.write_collapsed_stacks(stacks_path)
+    print(f"*** Wrote {len(profiler.events):,} trace events to {trace_path} and stacks to {stacks_path}")
@@ -23,18 +23,54 @@ Based on https://github.com/mCodingLLC/VideosSampleCode/blob/master/videos/030_t
 illustrated at https://www.youtube.com/watch?v=DnKxKFXB4NQ "The Single Most Useful Decorator in Python"
 by James Murphy of mCoding.com, with comments.
 
+@speed_decorator now sits above (outside) the cache, so calls answered from the cache
+are timed too, and only the outermost call of a recursion adds to RuntimeTracker,
+so nested calls are not counted twice.
+
+memoize() is a cache decorator that can be tuned instead of guessed at:
+bounded by entries and/or (approximate) bytes, with optional time-to-live per entry,
+LRU (least recently used) or LFU (least frequently used) eviction, safe across threads,
+and live counters (hits, misses, evictions, expirations, bytes held, time saved)
+that RuntimeTracker.report_caches() prints.
+
+memoize(single_flight=True) makes threads (or coroutines of an `async def` function)
+that miss on the same key at the same time wait for one computation instead of
+each computing it, and counts them as coalesced. See --single-flight.
+
+persistent_memoize() keeps results in a sqlite file instead, so reruns of a program
+(and several processes at once) look them up instead of computing them again.
+Stored results are dropped when the source code of the function changes.
+
 Advanced techniques can further reduce the time complexity to O(log n).
+fib_fast_doubling() and fib_matrix() do so without recursion, as does the O(n) fib_iterative(),
+so they work for any n without raising the recursion limit
+(which recursion_limit() now raises only while the recursive versions run).
+--benchmark times them all for n doubling from 32, up to --max-n for the engines
+(and up to RECURSIVE_MAX_N for the cached recursive versions), and --plot draws them log-log.
 See https://www.reddit.com/r/algorithms/comments/o8zsxv/complexity_of_recursive_fibonacci_sequence_with/
 https://www.perplexity.ai/search/write-python-code-to-display-f-Kj0kEkvUQJa5TzGKZxKIHw
 
 """
-__last_change__ = "25-10-03 v005 + RUN_ITERATIONS perf ray :recursive-cache.py"
+__last_change__ = "26-10-18 v009 + memoize(single_flight) for threads and asyncio --single-flight :recursive-cache.py"
 
 # Default Python library:
+import argparse
+import asyncio
+from collections import OrderedDict
+import concurrent.futures
+from contextlib import contextmanager
+import contextvars
 from datetime import datetime
+import hashlib
+import inspect
+import os
+import pickle
+import sqlite3
+import threading
 import time  # for sleep.
 from time import perf_counter_ns
 import sys
+import weakref
 #import functools
 
 # External libraries defined in requirements.txt:
@@ -49,15 +85,24 @@ except Exception as e:
     print("Please activate your virtual environment:\n  uv env env\n  source .venv/bin/activate")
     exit(9)
 
+# Only needed to plot benchmark_fib():
+try:
+    import matplotlib.pyplot as plt
+except ImportError:
+    plt = None
+
 
 # Globals:
 RUN_ITERATIONS = 2056   # [32, 64, 128, 256, 512, 1024, 2056]
 SHOW_EACH_ITERATION = False
+DEFAULT_PERSISTENT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "recursive-cache.sqlite3")
+PERSISTENT_FIB_N = 30   # Slow enough without caching (a fraction of a second) to show a warm rerun.
 runtime_total = 0
 runtime = 0
 
-#import sys
-sys.setrecursionlimit(30000)  # set higher limit
+RECURSION_LIMIT = 30000   # Set only while the recursive functions run, by recursion_limit().
+RECURSIVE_MAX_N = 2056    # Largest n benchmark_fib() gives the recursive functions.
+BENCHMARK_MAX_N = 2056    # Largest n of benchmark_fib() by default.
 
 # Program Timings:
 # For wall time measurements:
@@ -69,6 +114,7 @@ class RuntimeTracker:
     def __init__(self):
         """Initialize."""
         self.total_runtime = 0
+        self.caches = {}   # name -> MemoCache registered by memoize(tracker=...)
 
     def zero_total_runtime(self):
         """Zero out to init Total Runtime."""
@@ -82,25 +128,49 @@ class RuntimeTracker:
         """Get Total Runtime."""
         return self.total_runtime
 
+    def register_cache(self, memo_cache):
+        """Report counters of memo_cache in report_caches()."""
+        self.caches[memo_cache.name] = memo_cache
+
+    def report_caches(self):
+        """Print live counters of each registered cache."""
+        for name, memo_cache in self.caches.items():
+            stats = memo_cache.stats()
+            print(f"*** CACHE {name}: {stats['entries']:,} entries, {stats['bytes_held']:,} bytes held"
+                  f", hits {stats['hits']:,}, misses {stats['misses']:,}"
+                  f" (hit ratio {stats['hit_ratio']:.1%})"
+                  f", evictions {stats['evictions']:,}, expirations {stats['expirations']:,}"
+                  f", coalesced {stats['coalesced']:,}"
+                  f", time saved {stats['time_saved_secs']:.6f} secs")
+
 
 tracker = RuntimeTracker()
 
 
+_call_depth = threading.local()   # Depth of nested speed_decorator calls in each thread.
+
+
 def speed_decorator(func):
     """Decorate @warps."""
     @wraps(func)  # function after the @speed_decorator decorator:
     def wrapper(*args, **kwargs):
+        depth = getattr(_call_depth, "value", 0)
+        _call_depth.value = depth + 1
         # Record start time:
-        start_time = time.time()
-        # Call the original function:
-        result = func(*args, **kwargs)
+        start_time = time.perf_counter()
+        try:
+            # Call the original function:
+            result = func(*args, **kwargs)
+        finally:
+            _call_depth.value = depth
         # Record end time:
-        end_time = time.time()
+        end_time = time.perf_counter()
         # Calculate and print the runtime:
         runtime = end_time - start_time
 
-        # Add to total runtime:
-        tracker.add_runtime(runtime)
+        # Add to total runtime only the outermost call, which includes the recursive calls within it:
+        if depth == 0:
+            tracker.add_runtime(runtime)
         if SHOW_EACH_ITERATION:
             # Using Dunder method:
             print(f"{func.__name__} ran in {runtime:.6f} seconds")
@@ -110,8 +180,412 @@ def speed_decorator(func):
     return wrapper
 
 
-@cache   # from functools
+# The innermost memoized computation running in this thread or asyncio task:
+# a list of (start_ns, end_ns) of the memoized computations made within it.
+_compute_frame = contextvars.ContextVar("compute_frame", default=None)
+
+
+def _start_compute():
+    """Start timing a memoized computation, nested in any already running; pass the result to _finish_compute()."""
+    frame = []
+    return frame, _compute_frame.set(frame), perf_counter_ns()
+
+
+def _finish_compute(timer):
+    """Return the exclusive ns of a computation: its time minus that of the memoized calls it computed.
+
+    Those calls have cache entries of their own, so a hit is credited only with the work it skips.
+    Time covered by children running at once (asyncio.gather) is subtracted only once.
+    """
+    frame, token, start_ns = timer
+    end_ns = perf_counter_ns()
+    _compute_frame.reset(token)
+    parent = _compute_frame.get()
+    if parent is not None:
+        parent.append((start_ns, end_ns))
+    child_ns = 0
+    covered_to = start_ns
+    for child_start, child_end in sorted(frame):
+        child_ns += max(child_end - max(child_start, covered_to), 0)
+        covered_to = max(covered_to, child_end)
+    return end_ns - start_ns - child_ns
+
+
+class MemoCache:
+    """Thread-safe bounded store of results for memoize(), with live counters.
+
+    Bounded by max_entries and/or max_bytes (sys.getsizeof of each value, a shallow estimate).
+    Entries older than ttl seconds (if given) count as misses and are dropped.
+    When over a bound, policy "lru" evicts the least recently used entry;
+    "lfu" evicts the least frequently used one (the least recently used among equals).
+    The lock is held only while the store is read or changed, never while computing a value,
+    so a recursive function can call itself and other threads are not held up.
+    """
+
+    POLICIES = ("lru", "lfu")
+
+    def __init__(self, name, max_entries=None, max_bytes=None, ttl=None, policy="lru"):
+        if policy not in self.POLICIES:
+            raise ValueError(f"policy must be one of {self.POLICIES}, not {policy!r}")
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.policy = policy
+        self.lock = threading.RLock()
+        self.entries = OrderedDict()   # key -> [value, size, expires_at, compute_ns, frequency], oldest first
+        self.frequencies = {}          # For LFU: frequency -> OrderedDict of keys, oldest first
+        self.in_flight = {}            # For single_flight: key -> Future of the thread computing it
+        self.async_in_flight = weakref.WeakKeyDictionary()   # event loop -> {key: asyncio.Future}
+        self.clear()
+
+    def clear(self):
+        """Drop all entries and zero the counters."""
+        with self.lock:
+            self.entries.clear()
+            self.frequencies.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+            self.coalesced = 0   # Misses that waited for another caller's result instead of computing.
+            self.bytes_held = 0
+            self.time_saved_ns = 0
+
+    def get(self, key):
+        """Return (True, value) if key is cached and not expired, else (False, None)."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[2] is not None and entry[2] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            self.time_saved_ns += entry[3]
+            if self.policy == "lru":
+                self.entries.move_to_end(key)
+            else:
+                self._unlink_frequency(key, entry[4])
+                entry[4] += 1
+                self.frequencies.setdefault(entry[4], OrderedDict())[key] = None
+            return True, entry[0]
+
+    def put(self, key, value, compute_ns):
+        """Store value, which took compute_ns to calculate, evicting entries to stay in bounds."""
+        size = sys.getsizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return   # Would evict everything else and still not fit.
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+            while self.entries and (
+                    (self.max_entries is not None and len(self.entries) >= self.max_entries)
+                    or (self.max_bytes is not None and self.bytes_held + size > self.max_bytes)):
+                self._evict_one()
+            if self.max_entries == 0:
+                return
+            self.entries[key] = [value, size, expires_at, compute_ns, 1]
+            self.bytes_held += size
+            if self.policy == "lfu":
+                self.frequencies.setdefault(1, OrderedDict())[key] = None
+
+    def stats(self):
+        """Return a dict of the live counters.
+
+        time_saved_secs adds up, for each hit, how long that value took to compute when it was a miss,
+        not counting memoized calls made while computing it (see _finish_compute()).
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"entries": len(self.entries), "bytes_held": self.bytes_held,
+                    "hits": self.hits, "misses": self.misses,
+                    "hit_ratio": self.hits / lookups if lookups else 0.0,
+                    "evictions": self.evictions, "expirations": self.expirations,
+                    "coalesced": self.coalesced, "time_saved_secs": self.time_saved_ns / 1e9}
+
+    def _evict_one(self):
+        if self.policy == "lru":
+            key = next(iter(self.entries))
+        else:
+            key = next(iter(self.frequencies[min(self.frequencies)]))
+        self._remove(key)
+        self.evictions += 1
+
+    def _remove(self, key):
+        entry = self.entries.pop(key)
+        self.bytes_held -= entry[1]
+        if self.policy == "lfu":
+            self._unlink_frequency(key, entry[4])
+
+    def _unlink_frequency(self, key, frequency):
+        keys = self.frequencies[frequency]
+        del keys[key]
+        if not keys:
+            del self.frequencies[frequency]
+
+
+def memoize(max_entries=None, max_bytes=None, ttl=None, policy="lru", tracker=None, single_flight=False):
+    """Decorate a function to cache its results in a MemoCache, available as .cache on the function.
+
+    Arguments must be hashable, as with functools.cache.
+    An `async def` function gets an async wrapper that caches the awaited result.
+    With single_flight, callers that miss on a key another caller is already computing
+    wait for that one result instead of all computing it at once (a "thundering herd").
+    Waiting threads share a concurrent.futures.Future; waiting coroutines share an asyncio.Future
+    of their event loop. An exception raised by the computation is raised to every waiter
+    (and if the computing coroutine is cancelled, waiters get CancelledError).
+    Each such wait adds to the cache's coalesced counter.
+    With tracker (a RuntimeTracker), the cache's counters are printed by tracker.report_caches().
+    """
+    def decorator(func):
+        memo_cache = MemoCache(func.__qualname__, max_entries, max_bytes, ttl, policy)
+        if tracker is not None:
+            tracker.register_cache(memo_cache)
+
+        def make_key(args, kwargs):
+            return args + (_KWARGS_MARK,) + tuple(sorted(kwargs.items())) if kwargs else args
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+            with memo_cache.lock:
+                found, value = memo_cache.get(key)
+                if found:
+                    return value
+                future = memo_cache.in_flight.get(key) if single_flight else None
+                if future is None and single_flight:
+                    memo_cache.in_flight[key] = leader = concurrent.futures.Future()
+                elif future is not None:
+                    memo_cache.coalesced += 1
+            if future is not None:
+                return future.result()   # Wait for the thread already computing it.
+
+            timer = _start_compute()
+            try:
+                value = func(*args, **kwargs)
+            except BaseException as error:
+                _finish_compute(timer)
+                if single_flight:
+                    with memo_cache.lock:
+                        del memo_cache.in_flight[key]
+                    leader.set_exception(error)
+                raise
+            memo_cache.put(key, value, _finish_compute(timer))
+            if single_flight:
+                with memo_cache.lock:
+                    del memo_cache.in_flight[key]
+                leader.set_result(value)
+            return value
+
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+            loop = asyncio.get_running_loop()
+            with memo_cache.lock:
+                found, value = memo_cache.get(key)
+                if found:
+                    return value
+                in_flight = memo_cache.async_in_flight.setdefault(loop, {})
+                future = in_flight.get(key) if single_flight else None
+                if future is None and single_flight:
+                    in_flight[key] = leader = loop.create_future()
+                    # Mark any exception as retrieved, so there is no warning when nobody waited:
+                    leader.add_done_callback(lambda done: done.cancelled() or done.exception())
+                elif future is not None:
+                    memo_cache.coalesced += 1
+            if future is not None:
+                # shield() so a waiter being cancelled does not cancel the shared computation:
+                return await asyncio.shield(future)
+
+            timer = _start_compute()
+            try:
+                value = await func(*args, **kwargs)
+            except BaseException as error:
+                _finish_compute(timer)
+                if single_flight:
+                    with memo_cache.lock:
+                        del in_flight[key]
+                    if isinstance(error, asyncio.CancelledError):
+                        leader.cancel()
+                    else:
+                        leader.set_exception(error)
+                raise
+            memo_cache.put(key, value, _finish_compute(timer))
+            if single_flight:
+                with memo_cache.lock:
+                    del in_flight[key]
+                leader.set_result(value)
+            return value
+
+        chosen = async_wrapper if inspect.iscoroutinefunction(func) else wrapper
+        chosen.cache = memo_cache
+        chosen.cache_clear = memo_cache.clear
+        return chosen
+    return decorator
+
+
+_KWARGS_MARK = object()   # Separates positional from keyword arguments in memoize() keys.
+
+
+class PersistentCache:
+    """Memoized results kept in a sqlite file, so they outlive the process, for persistent_memoize().
+
+    Rows are keyed by function qualname + SHA-256 of the pickled arguments, and also store
+    code_version: a SHA-256 of the function's source. When the source changes,
+    rows stored under the old code version are deleted the first time the function is used.
+    Several processes (and threads, each with its own connection) can share the file:
+    sqlite WAL (write-ahead log) mode lets readers continue while one writer writes,
+    and writers wait up to `timeout` seconds for each other.
+    Bounded by max_entries and/or max_bytes of pickled values for this function;
+    the least recently used rows are deleted first.
+    Arguments and results must be picklable, and the function must be deterministic (pure).
+    """
+
+    def __init__(self, func, path=None, max_entries=None, max_bytes=None, timeout=30.0):
+        self.name = func.__qualname__
+        self.path = path or DEFAULT_PERSISTENT_CACHE_PATH
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        try:
+            source = inspect.getsource(func)
+        except (OSError, TypeError):   # No source file, such as in an interactive session.
+            source = repr(func.__code__.co_code) + repr(func.__code__.co_consts)
+        self.code_version = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        self._local = threading.local()
+        self.hits = self.misses = self.evictions = 0
+        self.time_saved_ns = 0
+        self._lock = threading.Lock()   # For the counters above.
+
+    def _connection(self):
+        """Return this thread's connection, opened on first use (and again in a forked child)."""
+        if getattr(self._local, "pid", None) != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("""CREATE TABLE IF NOT EXISTS memo (
+                func TEXT, arg_hash TEXT, code_version TEXT, value BLOB,
+                size INTEGER, compute_ns INTEGER, last_used REAL,
+                PRIMARY KEY (func, arg_hash))""")
+            connection.execute("CREATE INDEX IF NOT EXISTS memo_last_used ON memo (func, last_used)")
+            # Invalidate results of any other version of this function's code:
+            connection.execute("DELETE FROM memo WHERE func = ? AND code_version != ?",
+                               (self.name, self.code_version))
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    def key(self, args, kwargs):
+        """Return the SHA-256 hex digest of the pickled arguments, for get() and put()."""
+        return hashlib.sha256(pickle.dumps((args, sorted(kwargs.items())), protocol=4)).hexdigest()
+
+    def get(self, arg_hash):
+        """Return (True, value) if stored, else (False, None)."""
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT value, compute_ns FROM memo WHERE func = ? AND arg_hash = ? AND code_version = ?",
+            (self.name, arg_hash, self.code_version)).fetchone()
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            return False, None
+        connection.execute("UPDATE memo SET last_used = ? WHERE func = ? AND arg_hash = ?",
+                           (time.time(), self.name, arg_hash))
+        with self._lock:
+            self.hits += 1
+            self.time_saved_ns += row[1]
+        return True, pickle.loads(row[0])
+
+    def put(self, arg_hash, value, compute_ns):
+        """Store value, then delete least recently used rows of this function beyond the bounds."""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if self.max_bytes is not None and len(blob) > self.max_bytes:
+            return
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")   # Take the write lock now, so the bounds check is exact.
+        try:
+            connection.execute("INSERT OR REPLACE INTO memo VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               (self.name, arg_hash, self.code_version, blob, len(blob), compute_ns, time.time()))
+            evicted = 0
+            if self.max_entries is not None:
+                evicted += connection.execute(
+                    """DELETE FROM memo WHERE rowid IN (SELECT rowid FROM memo WHERE func = ?
+                       ORDER BY last_used DESC LIMIT -1 OFFSET ?)""",
+                    (self.name, self.max_entries)).rowcount
+            if self.max_bytes is not None:
+                total = 0
+                for rowid, size in connection.execute(
+                        "SELECT rowid, size FROM memo WHERE func = ? ORDER BY last_used DESC", (self.name,)).fetchall():
+                    total += size
+                    if total > self.max_bytes:
+                        connection.execute("DELETE FROM memo WHERE rowid = ?", (rowid,))
+                        evicted += 1
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self.evictions += evicted
+
+    def clear(self):
+        """Delete every stored result of this function, in all processes, and zero the counters."""
+        self._connection().execute("DELETE FROM memo WHERE func = ?", (self.name,))
+        with self._lock:
+            self.hits = self.misses = self.evictions = 0
+            self.time_saved_ns = 0
+
+    def stats(self):
+        """Return a dict of counters like MemoCache.stats(), counting this process's calls."""
+        entries, bytes_held = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM memo WHERE func = ?", (self.name,)).fetchone()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"entries": entries, "bytes_held": bytes_held,
+                    "hits": self.hits, "misses": self.misses,
+                    "hit_ratio": self.hits / lookups if lookups else 0.0,
+                    "evictions": self.evictions, "expirations": 0, "coalesced": 0,
+                    "time_saved_secs": self.time_saved_ns / 1e9}
+
+
+def persistent_memoize(path=None, max_entries=None, max_bytes=None, tracker=None):
+    """Decorate a pure function to keep its results on disk in a PersistentCache (.cache on the function).
+
+    Reruns of a program (or other processes running at the same time) then look results up
+    instead of computing them again. path defaults to DEFAULT_PERSISTENT_CACHE_PATH.
+    With tracker (a RuntimeTracker), the cache's counters are printed by tracker.report_caches().
+    """
+    def decorator(func):
+        persistent_cache = PersistentCache(func, path, max_entries, max_bytes)
+        if tracker is not None:
+            tracker.register_cache(persistent_cache)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            arg_hash = persistent_cache.key(args, kwargs)
+            found, value = persistent_cache.get(arg_hash)
+            if found:
+                return value
+            timer = _start_compute()
+            try:
+                value = func(*args, **kwargs)
+            finally:
+                compute_ns = _finish_compute(timer)
+            persistent_cache.put(arg_hash, value, compute_ns)
+            return value
+
+        wrapper.cache = persistent_cache
+        wrapper.cache_clear = persistent_cache.clear
+        return wrapper
+    return decorator
+
+
+
 @speed_decorator
+@cache   # from functools
 def fib(n):
     """Define Fibonacci infinite logic."""
     try:
@@ -125,8 +599,8 @@ def fib(n):
         sys.exit('FATAL: User-issued interrupt stopping program!')
 
 
-@cache   # from functools
 @speed_decorator
+@cache   # from functools
 def fib_cache(n):
     """Decorate for Speed."""
     if n <= 1:
@@ -136,8 +610,8 @@ def fib_cache(n):
     return fib_cache(n - 1) + fib_cache(n - 2)
 
 
-@lru_cache(maxsize=5)   # from functools
 @speed_decorator
+@lru_cache(maxsize=5)   # from functools
 def fib_lru_cache(n):
     """Decorae for LRU Cache."""
     if n <= 1:
@@ -147,30 +621,239 @@ def fib_lru_cache(n):
     return fib_lru_cache(n - 1) + fib_lru_cache(n - 2)
 
 
+@speed_decorator
+@memoize(max_entries=64, max_bytes=64 * 1024, ttl=60, policy="lru", tracker=tracker)
+def fib_memoize(n):
+    """Decorate with bounded memoize(), whose counters RuntimeTracker reports."""
+    if n <= 1:
+        return n
+    if SHOW_EACH_ITERATION:
+        print(f"fib_memoize {n}...")
+    return fib_memoize(n - 1) + fib_memoize(n - 2)
+
+
+def fib_naive(n):
+    """Fibonacci without any caching: O(2^n) calls."""
+    return n if n <= 1 else fib_naive(n - 1) + fib_naive(n - 2)
+
+
+@persistent_memoize(max_entries=1000, tracker=tracker)
+def fib_persistent(n):
+    """Keep results on disk, so a rerun of this program looks them up."""
+    return fib_naive(n)
+
+
+# Fibonacci engines without recursion, so any n works at the default recursion limit:
+
+def fib_iterative(n):
+    """O(n) additions of ever larger integers."""
+    a, b = 0, 1
+    for _ in range(n):
+        a, b = b, a + b
+    return a
+
+
+def fib_fast_doubling(n):
+    """Return F(n) by fast doubling, in O(log n) big-integer multiplications.
+
+    Uses F(2k) = F(k) * (2F(k+1) - F(k)) and F(2k+1) = F(k)^2 + F(k+1)^2,
+    one step per bit of n from the highest.
+    """
+    a, b = 0, 1   # F(k), F(k+1) for k = the bits of n seen so far
+    for bit in bin(n)[2:]:
+        c = a * (2 * b - a)   # F(2k)
+        d = a * a + b * b     # F(2k+1)
+        if bit == "1":
+            a, b = d, c + d   # k = 2k + 1
+        else:
+            a, b = c, d       # k = 2k
+    return a
+
+
+def fib_matrix(n):
+    """O(log n) 2x2 matrix multiplications: [[1, 1], [1, 0]]^n = [[F(n+1), F(n)], [F(n), F(n-1)]]."""
+    def multiply(x, y):
+        return (x[0] * y[0] + x[1] * y[2], x[0] * y[1] + x[1] * y[3],
+                x[2] * y[0] + x[3] * y[2], x[2] * y[1] + x[3] * y[3])
+
+    result = (1, 0, 0, 1)   # Identity matrix, as (top left, top right, bottom left, bottom right).
+    power = (1, 1, 1, 0)
+    while n:
+        if n & 1:
+            result = multiply(result, power)
+        power = multiply(power, power)
+        n >>= 1
+    return result[1]
+
+
+@contextmanager
+def recursion_limit(limit):
+    """Raise the recursion limit only while the recursive fib functions run."""
+    old_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(old_limit, limit))
+    try:
+        yield
+    finally:
+        sys.setrecursionlimit(old_limit)
+
+
+FIB_STRATEGIES = {   # name -> (function, recursive and cached, so its cache must be cleared before each run)
+    "fib_iterative": (fib_iterative, False),
+    "fib_fast_doubling": (fib_fast_doubling, False),
+    "fib_matrix": (fib_matrix, False),
+    "fib_cache @cache": (fib_cache, True),
+    "fib_lru_cache @lru_cache(5)": (fib_lru_cache, True),
+    "fib_memoize memoize(64)": (fib_memoize, True),
+}
+
+
+def benchmark_fib(max_n=BENCHMARK_MAX_N, repeat=5, plot_path=None):
+    """Time every Fibonacci strategy in FIB_STRATEGIES over n doubling from 32 to max_n.
+
+    RUN_ITERATIONS (2056) is added to the sweep, and the recursive strategies run only up to
+    RECURSIVE_MAX_N. Checks all agree, prints a table, and plots log-log to plot_path.
+    """
+    sweep = []
+    n = 32
+    while n <= max_n:
+        sweep.append(n)
+        n *= 2
+    if RUN_ITERATIONS <= max_n and RUN_ITERATIONS not in sweep:
+        sweep.append(RUN_ITERATIONS)
+        sweep.sort()
+    timings = {name: [] for name in FIB_STRATEGIES}
+    print(f"{'n':>9} " + " ".join(f"{name.split()[0]:>17}" for name in FIB_STRATEGIES) + "   (best of"
+          f" {repeat}, secs)")
+    for n in sweep:
+        expected = fib_fast_doubling(n)
+        cells = []
+        for name, (func, recursive) in FIB_STRATEGIES.items():
+            if recursive and n > RECURSIVE_MAX_N:
+                cells.append(f"{'-':>17}")
+                continue
+            best = float("inf")
+            for _ in range(repeat):
+                if recursive:
+                    func.__wrapped__.cache_clear()   # Under speed_decorator. Time the whole recursion, not a lookup.
+                with recursion_limit(RECURSION_LIMIT):
+                    strt_ns = perf_counter_ns()
+                    result = func(n)
+                    best = min(best, (perf_counter_ns() - strt_ns) / 1e9)
+                if result != expected:
+                    print(f"*** {name}({n}) returned a wrong number. Programming error.")
+                    exit(9)
+            timings[name].append((n, best))
+            cells.append(f"{best:>17.6f}")
+        print(f"{n:>9,} " + " ".join(cells))
+    tracker.zero_total_runtime()   # speed_decorator added the recursive runs.
+
+    if plot_path:
+        if plt is None:
+            print("*** matplotlib is not installed, so no plot.")
+            return timings
+        fig, ax = plt.subplots(figsize=(8, 5))
+        for name, points in timings.items():
+            if points:
+                ax.plot(*zip(*points), marker="o", label=name,
+                        linestyle="--" if FIB_STRATEGIES[name][1] else "-")
+        ax.set_xscale("log", base=2)
+        ax.set_yscale("log")
+        ax.set_xlabel("n")
+        ax.set_ylabel(f"best of {repeat} seconds")
+        ax.set_title("Fibonacci(n): engines (solid) vs cached recursion (dashed)")
+        ax.grid(True, which="both", alpha=0.3)
+        ax.legend()
+        fig.tight_layout()
+        fig.savefig(plot_path)
+        print(f"*** Saved plot to {plot_path}")
+    return timings
+
+
+SINGLE_FLIGHT_CALLERS = 16
+computations = {"threads": 0, "coroutines": 0}
+
+
+@memoize(single_flight=True, tracker=tracker)
+def slow_report(key):
+    """Stand-in for an expensive computation that many threads ask for at once."""
+    computations["threads"] += 1
+    time.sleep(0.2)
+    return f"report {key}"
+
+
+@memoize(single_flight=True, tracker=tracker)
+async def slow_fetch(key):
+    """Stand-in for an expensive request that many coroutines ask for at once."""
+    computations["coroutines"] += 1
+    await asyncio.sleep(0.2)
+    return f"fetched {key}"
+
+
+def demo_single_flight():
+    """Have SINGLE_FLIGHT_CALLERS threads, then coroutines, miss on the same key at once."""
+    strt_ns = perf_counter_ns()
+    with concurrent.futures.ThreadPoolExecutor(SINGLE_FLIGHT_CALLERS) as pool:
+        results = list(pool.map(slow_report, ["daily"] * SINGLE_FLIGHT_CALLERS))
+    print(f"*** INFO: {len(results)} threads got {results[0]!r} from {computations['threads']} computation(s)"
+          f" in {(perf_counter_ns() - strt_ns) / 1e9:.3f} seconds.")
+
+    async def callers():
+        return await asyncio.gather(*(slow_fetch("page") for _ in range(SINGLE_FLIGHT_CALLERS)))
+
+    strt_ns = perf_counter_ns()
+    results = asyncio.run(callers())
+    print(f"*** INFO: {len(results)} coroutines got {results[0]!r} from {computations['coroutines']} computation(s)"
+          f" in {(perf_counter_ns() - strt_ns) / 1e9:.3f} seconds.")
+    tracker.report_caches()
+
+
 def main():
     """Run the decorated functions."""
-    # TODO: Increase RUN_ITERATIONS exponentialls: [32, 64, 128, 256, 512, 1024, 2056]
-    # TODO: Plot results like https://github.com/wilsonmar/python-samples/blob/main/sorting.py
+    # See benchmark_fib() for RUN_ITERATIONS increased exponentially: [32, 64, 128, 256, 512, 1024, 2056]
     # https://www.anyscale.com/blog/writing-your-first-distributed-python-application-with-ray
 
     t_ns_start = perf_counter_ns()  # Start task time stamp
     print(f"*** {pgm_strt_datetimestamp} starting...")
 
-    print(f"*** INFO: {RUN_ITERATIONS} recursions without caching:", end="")
-    result1 = fib(RUN_ITERATIONS)
-    print(f" cum. runtime: {tracker.get_total_runtime():.6f} seconds. {len(str(result1))}")
+    with recursion_limit(RECURSION_LIMIT):
+        print(f"*** INFO: {RUN_ITERATIONS} recursions without caching:", end="")
+        result1 = fib(RUN_ITERATIONS)
+        print(f" cum. runtime: {tracker.get_total_runtime():.6f} seconds. {len(str(result1))}")
 
-    tracker.zero_total_runtime()
+        tracker.zero_total_runtime()
 
-    print(f"*** INFO: {RUN_ITERATIONS} recursions with functools @cache:", end="")
-    result2 = fib_cache(RUN_ITERATIONS)
-    print(f" cum. runtime: {tracker.get_total_runtime():.6f} seconds. {len(str(result2))}")
+        print(f"*** INFO: {RUN_ITERATIONS} recursions with functools @cache:", end="")
+        result2 = fib_cache(RUN_ITERATIONS)
+        print(f" cum. runtime: {tracker.get_total_runtime():.6f} seconds. {len(str(result2))}")
 
-    tracker.zero_total_runtime()
+        tracker.zero_total_runtime()
 
-    print(f"*** INFO: {RUN_ITERATIONS} recursions with functools @lru_cache(maxsize=5):", end="")
-    result3 = fib_lru_cache(RUN_ITERATIONS)
-    print(f" cum. runtime: {tracker.get_total_runtime():.6f} seconds. {len(str(result3))}")
+        print(f"*** INFO: {RUN_ITERATIONS} recursions with functools @lru_cache(maxsize=5):", end="")
+        result3 = fib_lru_cache(RUN_ITERATIONS)
+        print(f" cum. runtime: {tracker.get_total_runtime():.6f} seconds. {len(str(result3))}")
+
+        tracker.zero_total_runtime()
+
+        print(f"*** INFO: {RUN_ITERATIONS} recursions with memoize(max_entries=64, max_bytes=64KB, ttl=60):", end="")
+        result4 = fib_memoize(RUN_ITERATIONS)
+        result4 = fib_memoize(RUN_ITERATIONS)   # Again, to be answered from the cache.
+        print(f" cum. runtime: {tracker.get_total_runtime():.6f} seconds. {len(str(result4))}")
+
+    print(f"*** INFO: {RUN_ITERATIONS} with non-recursive engines:", end="")
+    for func in (fib_iterative, fib_fast_doubling, fib_matrix):
+        strt_ns = perf_counter_ns()
+        if func(RUN_ITERATIONS) != result2:
+            print(f"*** {func.__name__} returned a wrong number. Programming error.")
+            exit(9)
+        print(f" {func.__name__} {(perf_counter_ns() - strt_ns) / 1e9:.6f}", end="")
+    print(" seconds.")
+
+    print(f"*** INFO: fib_persistent({PERSISTENT_FIB_N}) stored in {DEFAULT_PERSISTENT_CACHE_PATH}:", end="")
+    t_ns = perf_counter_ns()
+    result5 = fib_persistent(PERSISTENT_FIB_N)
+    how = "looked up from an earlier run" if fib_persistent.cache.hits else "computed; run again to look it up"
+    print(f" {result5} {how} in {(perf_counter_ns() - t_ns) / 1e9:.6f} seconds.")
+    tracker.report_caches()
 
     # time.sleep(SLEEP_SECS)  # seconds
     t_ns_stop = time.perf_counter_ns()  # Stop time stamp
@@ -189,8 +872,21 @@ def main():
         )
 
 if __name__ == '__main__':
-
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Time each Fibonacci strategy for n doubling from 32 instead")
+    parser.add_argument("--max-n", type=int, default=BENCHMARK_MAX_N, help="Largest n of --benchmark")
+    parser.add_argument("--plot", metavar="FILE.png", help="With --benchmark: save a log-log plot")
+    parser.add_argument("--single-flight", action="store_true",
+                        help="Show concurrent cache misses coalesced into one computation instead")
+    args = parser.parse_args()
+
+    if args.single_flight:
+        demo_single_flight()
+    elif args.benchmark:
+        benchmark_fib(args.max_n, plot_path=args.plot)
+    else:
+        main()
 
     pgm_stop_datetimestamp = datetime.now()
     pgm_elapsed_wall_time = pgm_stop_datetimestamp - pgm_strt_datetimestamp
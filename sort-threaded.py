@@ -2,32 +2,52 @@
 
 """ sort-threaded.py at https://github.com/wilsonmar/python-samples/blob/main/sort-threaded.py
 
-git commit -m "v001 create from base :soft-threaded.py"
+git commit -m "v002 processes on shared array, merge path :sort-threaded.py"
 
-Python Program to implement merge sort using multi-threading for 
-O(N Log N) space complexity ("with a bullet").
-Use of subarrarys make for Space Complexity O(n).
+Python Program to implement merge sort in parallel for
+O(N Log N) time complexity split across workers.
 Based on https://www.geeksforgeeks.org/merge-sort-using-multi-threading/
+which used threads on a global list. Because of the GIL (Global Interpreter Lock),
+those threads never ran at the same time, so this version uses worker processes instead:
+
+1. The numbers are in a typed shared buffer (multiprocessing.RawArray of 8-byte ints),
+   so workers read and write the same memory without pickling the numbers.
+2. Each worker sorts its own disjoint range of indexes in place with merge_sort(low, high).
+3. Sorted ranges are merged in rounds. Each merge is itself split across all workers
+   with "merge path": every worker binary-searches where its share of the output
+   starts and ends, then merges only that part. Output ranges never overlap,
+   so no locks are needed.
+Merges ping-pong between two buffers, so Space Complexity is O(n).
+
+USAGE:
+    ./sort-threaded.py -n 1000000 -w 8
+to report speedup of 1, 2, 4, 8 workers versus 1 worker.
 """
 
 # Build-in packages:
-import threading
-import time
+import argparse
+from array import array
+import multiprocessing
+import os
 import random
+import time
 
 # number of elements in array
 MAX = 20
 
-# number of threads
-THREAD_MAX = 4
+# number of worker processes
+THREAD_MAX = os.cpu_count() or 1
 
+# Within each worker: views of the two shared buffers (set by init_worker):
 a = [0] * MAX
-part = 0
+buffers = []
+
 
 # merge function for merging two parts
 def merge(low, mid, high):
-    left = a[low:mid+1]
-    right = a[mid+1:high+1]
+    # list() copies, as slicing a shared buffer view does not:
+    left = list(a[low:mid+1])
+    right = list(a[mid+1:high+1])
 
     # n1 is size of left part and n2 is size
     # of right part
@@ -68,44 +88,149 @@ def merge_sort(low, high):
         # merging the two halves
         merge(low, mid, high)
 
-# thread function for multi-threading
-def merge_sort_threaded():
-    global part
-
-    # creating 4 threads
-    for i in range(THREAD_MAX):
-        t = threading.Thread(target=merge_sort, args=(part*(MAX//4), (part+1)*(MAX//4)-1))
-        part += 1
-        t.start()
-
-    # joining all 4 threads
-    for i in range(THREAD_MAX):
-        t.join()
 
-    # merging the final 4 parts
-    merge(0, (MAX // 2 - 1) // 2, MAX // 2 - 1)
-    merge(MAX // 2, MAX // 2 + (MAX - 1 - MAX // 2) // 2, MAX - 1)
-    merge(0, (MAX - 1) // 2, MAX - 1)
+def init_worker(shared_a, shared_b):
+    """View both shared buffers as 8-byte ints, once in each worker process."""
+    global a, buffers
+    buffers = [memoryview(shared_a).cast("B").cast("q"),
+               memoryview(shared_b).cast("B").cast("q")]
+    a = buffers[0]
 
 
-# Driver Code:
-if __name__ == '__main__':
-      # generating random values in array
-    for i in range(MAX):
-        a[i] = random.randint(0, 100)
+def sort_range(low, high):
+    """Worker task: sort a[low..high] in place."""
+    merge_sort(low, high)
+    return high - low + 1
 
-     # t1 and t2 for calculating time for
-    # merge sort
-    t1 = time.perf_counter()
 
-    merge_sort_threaded()
+def co_rank(src, a_low, a_len, b_low, b_len, diagonal):
+    """Return how many of the first `diagonal` merged elements come from run A (merge path).
 
-    t2 = time.perf_counter()
+    Binary search for the smallest i where B[diagonal-i-1] < A[i],
+    so ties take A first and the merge stays stable.
+    """
+    low = max(0, diagonal - b_len)
+    high = min(diagonal, a_len)
+    while low < high:
+        i = (low + high) // 2
+        if src[a_low + i] > src[b_low + diagonal - i - 1]:
+            high = i
+        else:
+            low = i + 1
+    return low
+
+
+def merge_path_task(src_index, a_low, a_len, b_low, b_len, diag_start, diag_end):
+    """Worker task: write merged elements diag_start..diag_end-1 of runs A and B.
+
+    A starts at a_low and B right after it, in buffer src_index.
+    Output goes to the same indexes in the other buffer.
+    """
+    src = buffers[src_index]
+    dst = buffers[1 - src_index]
+    i = co_rank(src, a_low, a_len, b_low, b_len, diag_start)
+    j = diag_start - i
+    i_end = co_rank(src, a_low, a_len, b_low, b_len, diag_end)
+    j_end = diag_end - i_end
+    k = a_low + diag_start
+    while i < i_end and j < j_end:
+        if src[b_low + j] < src[a_low + i]:
+            dst[k] = src[b_low + j]
+            j += 1
+        else:
+            dst[k] = src[a_low + i]
+            i += 1
+        k += 1
+    while i < i_end:
+        dst[k] = src[a_low + i]
+        i += 1
+        k += 1
+    while j < j_end:
+        dst[k] = src[b_low + j]
+        j += 1
+        k += 1
+    return diag_end - diag_start
+
+
+# parallel function replacing the threads:
+def merge_sort_parallel(pool, workers, n):
+    """Sort shared buffer 0 with the pool; return index (0 or 1) of the buffer holding the result."""
+    # Each worker sorts one disjoint range:
+    bounds = [(part * n // workers, (part + 1) * n // workers) for part in range(workers)]
+    runs = [(low, high - low) for low, high in bounds if high > low]
+    pool.starmap(sort_range, [(low, low + length - 1) for low, length in runs])
+
+    # Merge pairs of runs until one is left, splitting each merge across all workers:
+    src_index = 0
+    while len(runs) > 1:
+        tasks = []
+        next_runs = []
+        for pair in range(0, len(runs), 2):
+            a_low, a_len = runs[pair]
+            b_len = runs[pair + 1][1] if pair + 1 < len(runs) else 0
+            total = a_len + b_len
+            # Share of the workers in proportion to this merge's part of all elements:
+            pieces = max(1, round(workers * total / n))
+            diagonals = [total * piece // pieces for piece in range(pieces + 1)]
+            for diag_start, diag_end in zip(diagonals, diagonals[1:]):
+                tasks.append((src_index, a_low, a_len, a_low + a_len, b_len, diag_start, diag_end))
+            next_runs.append((a_low, total))
+        pool.starmap(merge_path_task, tasks)
+        runs = next_runs
+        src_index = 1 - src_index
+    return src_index
 
-    print("Sorted array:", a)
-    print(f"Time taken: {t2 - t1:.6f} seconds")
 
-""" Output:
-Sorted array: [0, 13, 22, 26, 28, 33, 48, 49, 49, 50, 52, 58, 61, 61, 63, 77, 77, 81, 83, 85]
-Time taken: 0.000243 seconds    
-"""
\ No newline at end of file
+# Driver Code:
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--elements", type=int, default=MAX, help="Number of elements to sort")
+    parser.add_argument("-w", "--workers", type=int, default=THREAD_MAX, help="Most worker processes to try")
+    args = parser.parse_args()
+    n = args.elements
+
+    # generating random values in array
+    numbers = [random.randint(0, 100) for _ in range(n)]
+    expected = sorted(numbers)
+
+    # Typed shared buffers without locks: workers only ever write disjoint ranges.
+    shared_a = multiprocessing.RawArray("q", n)
+    shared_b = multiprocessing.RawArray("q", n)
+    buffers = [memoryview(shared_a).cast("B").cast("q"),
+               memoryview(shared_b).cast("B").cast("q")]
+
+    # Try 1, 2, 4, ... workers up to --workers:
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= args.workers:
+        worker_counts.append(worker_counts[-1] * 2)
+    if worker_counts[-1] != args.workers:
+        worker_counts.append(args.workers)
+
+    base_time = None
+    for workers in worker_counts:
+        with multiprocessing.Pool(workers, initializer=init_worker,
+                                  initargs=(shared_a, shared_b)) as pool:
+            buffers[0][:] = array("q", numbers)
+            # t1 and t2 for calculating time for
+            # merge sort (not counting start of the worker processes)
+            t1 = time.perf_counter()
+            result_index = merge_sort_parallel(pool, workers, n)
+            t2 = time.perf_counter()
+
+        result = buffers[result_index].tolist()
+        if result != expected:
+            print(f"{workers} workers returned an unsorted array. Programming error.")
+            exit(9)
+        if base_time is None:
+            base_time = t2 - t1
+        print(f"{workers:>3} workers: {t2 - t1:.6f} seconds, speedup {base_time / (t2 - t1):.2f}x")
+
+    if n <= 100:
+        print("Sorted array:", result)
+
+""" Output of ./sort-threaded.py -n 1000000 -w 4 on a 1-core VM,
+where extra workers can only add overhead. Run on more cores to see the speedup:
+  1 workers: 1.747244 seconds, speedup 1.00x
+  2 workers: 1.740821 seconds, speedup 1.00x
+  4 workers: 1.929414 seconds, speedup 0.91x
+"""
@@ -30,16 +30,30 @@ from https://www.cuantum.tech/app/section/41-divide-and-conquer-algorithms-ecd63
    Ruff replaces Flake8, Pylint, Xenon, Radon, Black, isort, pyupgrade, etc.
 
 # TODO: SECTION 1 - Set Utilities, parameters, secrets in .env file
-# TODO: Capture memory to calculate usage for measuring space complexity.
 
 """
 
-__last_change__ = "25-09-11 v026 + rm timsort :sorting.py"
+__last_change__ = "26-10-18 v036 + parallel sample sort :sorting.py"
 
 # Internal imports (no pip/uv add needed):
 import argparse
+from array import array as typed_array
+from concurrent.futures import ProcessPoolExecutor
+import csv
 from datetime import datetime, timezone
-import random
+import functools
+import heapq
+import itertools
+import json
+import math
+import mmap
+from multiprocessing import shared_memory
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import tracemalloc
 import time    # for timed_func()
 import timeit
 #from timeit import default_timer as timer
@@ -53,12 +67,18 @@ try:
     import numpy as np
     import pandas as pd
     import seaborn as sns
-    import threading
 except Exception as e:
     print(f"Python module import failed: {e}")
     print("Please activate your virtual environment:\n  python3 -m venv venv\n  source venv/bin/activate")
     exit(9)
 
+# Globals: set from command line options under __main__ below;
+# these defaults apply when functions are used by importing this module:
+SHOW_ITERATION = False
+SHOW_RUNTIMES = False
+SHOW_RESULTS_CALCS = False
+RANDOMNESS = "random"   # Shown in plot titles.
+
 
 def timed_func(func_to_time):
     """Time function."""
@@ -100,25 +120,113 @@ def bubble_sort(array):
     return sorted_list
 
 
+# Partitions this small are handed to insertion_sort(), which is faster on few elements:
+INSERTION_SORT_CUTOFF = 16
+
+
 def quicksort(array):
-    """Quicksort has worst-case runtime complexity of O(n^2).
+    """Quicksort (introsort-style) with O(n log n) worst-case runtime complexity.
 
-        But otherwise best/average case time & space complexity of O(n log n). 
-    But it is not considered "stable" as other sorting algorithms.
-    Args: list_to_sort: A list of numbers to be sorted.
+    Plain quicksort goes O(n^2) on already-sorted input when it always picks the first element as pivot.
+    This version picks the median of three as pivot, swaps in place by index (no new lists per level),
+    and switches to heapsort when recursion gets deeper than 2*log2(n).
+    It is not "stable" like merge sort.
+    Args: array: A list of numbers to be sorted.
     Returns a new list with the numbers sorted in ascending order.
     """
-    # A copy of the list is not needed because swaps use indexes:
-    if len(array) < 2:
-        return array
-    else:
-        pivot = array[0]
-        less = [i for i in array[1:] if i <= pivot]
-        greater = [i for i in array[1:] if i > pivot]
-        # WARNING: Function calls itself (is recursive):
-        array = quicksort(less) + [pivot] + quicksort(greater)
+    items = list(array)
+    return quicksort_in_place(items)
+
+
+def quicksort_in_place(items, left=0, right=None):
+    """Sort items[left..right] in place using an explicit stack instead of recursion.
+
+    The larger partition is pushed on the stack and the smaller one is worked on next,
+    so the stack never holds more than log2(n) entries.
+    """
+    if right is None:  # If None, we want to sort the full list
+        right = len(items) - 1
+    max_depth = 2 * (right - left + 1).bit_length()   # About 2*log2(n).
+    stack = [(left, right, 0)]
+    while stack:
+        low, high, depth = stack.pop()
+        while high - low + 1 > INSERTION_SORT_CUTOFF:
+            if depth > max_depth:
+                # Too many bad pivots: heapsort guarantees O(n log n) for the rest.
+                heapsort(items, low, high)
+                break
+            depth += 1
+            split = _partition_median_of_three(items, low, high)
+            if split - low < high - split:
+                stack.append((split + 1, high, depth))
+                high = split
+            else:
+                stack.append((low, split, depth))
+                low = split + 1
+        else:  # Loop ended without break: partition is small enough.
+            insertion_sort(items, low, high)
+    return items
 
-        return array
+
+def _partition_median_of_three(items, low, high):
+    """Hoare partition of items[low..high] around the median of first, middle and last.
+
+    Returns split so that items[low..split] <= pivot <= items[split+1..high].
+    Equal elements are spread across both sides, so many duplicates do not slow it down.
+    """
+    mid = (low + high) // 2
+    # Order the three samples so the median lands at mid:
+    if items[mid] < items[low]:
+        items[low], items[mid] = items[mid], items[low]
+    if items[high] < items[low]:
+        items[low], items[high] = items[high], items[low]
+    if items[high] < items[mid]:
+        items[mid], items[high] = items[high], items[mid]
+    pivot = items[mid]
+
+    i = low - 1
+    j = high + 1
+    while True:
+        i += 1
+        while items[i] < pivot:
+            i += 1
+        j -= 1
+        while items[j] > pivot:
+            j -= 1
+        if i >= j:
+            return j
+        items[i], items[j] = items[j], items[i]
+
+
+def heapsort(items, left=0, right=None):
+    """Heapsort items[left..right] in place in O(n log n) time with no extra memory.
+
+    Used by quicksort_in_place() as its worst-case fallback.
+    """
+    if right is None:  # If None, we want to sort the full list
+        right = len(items) - 1
+    size = right - left + 1
+    # Build a max-heap, then repeatedly move the largest to the end:
+    for root in range(size // 2 - 1, -1, -1):
+        _sift_down(items, left, root, size)
+    for end in range(size - 1, 0, -1):
+        items[left], items[left + end] = items[left + end], items[left]
+        _sift_down(items, left, 0, end)
+    return items
+
+
+def _sift_down(items, offset, root, size):
+    """Move items[offset+root] down the max-heap of size elements starting at offset."""
+    while True:
+        child = 2 * root + 1
+        if child >= size:
+            return
+        if child + 1 < size and items[offset + child] < items[offset + child + 1]:
+            child += 1
+        if items[offset + root] >= items[offset + child]:
+            return
+        items[offset + root], items[offset + child] = items[offset + child], items[offset + root]
+        root = child
 
 
 def insertion_sort(items, left=0, right=None):
@@ -183,254 +291,837 @@ def merge(left, right):
     return merged
 
 
-def multi_threaded_merge_sort(arr, num_threads=4):
-    """Multi-thread merge sort."""
-    if num_threads <= 1:
-        return merge_sort(arr)
+# Natural runs shorter than this are extended with insertion_sort() before merging, like Timsort:
+MIN_RUN = 32
 
-    chunk_size = len(arr) // num_threads
-    if chunk_size == 0:
-        chunk_size = 1
 
-    sublists = [arr[i:i+chunk_size] for i in range(0, len(arr), chunk_size)]
-    if SHOW_RESULTS_CALCS:
-        print(f"len(arr)={len(arr)} // num_threads={num_threads} = chunk_size={chunk_size}")
-
-    threads = []
-    sorted_sublists = []
-
-    for sublist in sublists:
-        thread = threading.Thread(
-            target=lambda sl=sublist: sorted_sublists.append(merge_sort(sl))
-        )
-        thread.start()
-        threads.append(thread)
-
-    for thread in threads:
-        thread.join()
-
-    while len(sorted_sublists) > 1:
-        new_sublists = []
-        for i in range(0, len(sorted_sublists), 2):
-            if i+1 < len(sorted_sublists):
-                new_sublists.append(merge(sorted_sublists[i], sorted_sublists[i+1]))
-            else:
-                new_sublists.append(sorted_sublists[i])
-        sorted_sublists = new_sublists
+def merge_sort_bottom_up(list_to_sort):
+    """Merge Sort without recursion or slicing, O(n log n) time but only O(n) extra space.
 
-    return sorted_sublists[0] if sorted_sublists else []
+    merge_sort() slices and builds new lists at every level (about n log n temporary objects).
+    This version allocates one auxiliary buffer up front, then merges runs back and forth
+    ("ping-pong") between the list and the buffer on each pass.
+    Like Timsort, it first finds natural ascending runs (reversing strictly descending ones),
+    so input that is already partially sorted needs fewer passes. It is stable.
+    Args:
+        list_to_sort: A list of numbers to be sorted.
+    Returns a new list with the numbers sorted in ascending order.
+    """
+    src = list(list_to_sort)
+    n = len(src)
+    if n < 2:
+        return src
+
+    # Run boundaries: run k is src[boundaries[k]:boundaries[k+1]].
+    boundaries = [0]
+    low = 0
+    while low < n:
+        high = low + 1
+        if high < n and src[high] < src[low]:
+            while high < n and src[high] < src[high - 1]:
+                high += 1
+            _reverse_in_place(src, low, high - 1)   # Strictly descending, so still stable.
+        else:
+            while high < n and src[high] >= src[high - 1]:
+                high += 1
+        if high - low < MIN_RUN and high < n:
+            high = min(low + MIN_RUN, n)
+            insertion_sort(src, low, high - 1)
+        boundaries.append(high)
+        low = high
+
+    dst = [0] * n   # The only auxiliary buffer.
+    while len(boundaries) > 2:
+        merged_boundaries = [0]
+        for k in range(0, len(boundaries) - 1, 2):
+            low = boundaries[k]
+            if k + 2 < len(boundaries):
+                high = boundaries[k + 2]
+                _merge_runs(src, dst, low, boundaries[k + 1], high)
+            else:  # Odd run out: carry it over to the other buffer unchanged.
+                high = boundaries[k + 1]
+                for i in range(low, high):
+                    dst[i] = src[i]
+            merged_boundaries.append(high)
+        boundaries = merged_boundaries
+        src, dst = dst, src
+    return src
+
+
+def _reverse_in_place(items, low, high):
+    """Reverse items[low..high] by swapping from both ends."""
+    while low < high:
+        items[low], items[high] = items[high], items[low]
+        low += 1
+        high -= 1
+
+
+def _merge_runs(src, dst, low, mid, high):
+    """Merge sorted src[low:mid] and src[mid:high] into dst[low:high] by index."""
+    i = low
+    j = mid
+    k = low
+    while i < mid and j < high:
+        if src[j] < src[i]:
+            dst[k] = src[j]
+            j += 1
+        else:  # Take from the left on ties to keep the sort stable.
+            dst[k] = src[i]
+            i += 1
+        k += 1
+    while i < mid:
+        dst[k] = src[i]
+        i += 1
+        k += 1
+    while j < high:
+        dst[k] = src[j]
+        j += 1
+        k += 1
+
+
+def counting_sort(array):
+    """Sort integers by Counting Sort in pure Python, with time complexity O(n + k), for k = max - min + 1.
+
+    Only works on integers. The benchmark lists are small bounded integers
+    (random.randint(1, n+1)), so k is about n and this is linear time.
+    Counts are kept in a typed array('q') of 8-byte integers rather than a list of objects.
+    Returns a new list with the numbers sorted in ascending order.
+    """
+    if len(array) == 0:
+        return []
+    low = min(array)
+    high = max(array)
+    counts = typed_array('q', bytes(8 * (high - low + 1)))   # All zeros.
+    for value in array:
+        counts[value - low] += 1
+    sorted_list = []
+    for offset, count in enumerate(counts):
+        if count:
+            sorted_list.extend([low + offset] * count)
+    return sorted_list
 
 
-def report_elap_time(cur_batch, task_in, elap_time ):
-    """Assign vertical columns of human-reable numbers converted to microseconds/nanoseconds.
+def radix_sort(array, bits_per_digit=8):
+    """LSD (Least Significant Digit) Radix Sort vectorised with NumPy, O(n * w/b) time.
 
-    8 Bubble sort    elap_time:   1390.2921 microseconds
-    8 Insertion sort elap_time:    832.5831 microseconds
-    8 Quicksort      elap_time:    951.2911 microseconds
-    8 Merge sort     elap_time:    178.7501 microseconds
+    w is the number of bits needed for max - min and b is bits_per_digit.
+    Each pass orders by one digit with a stable sort of small unsigned digits,
+    which NumPy itself does with a linear-time radix/counting sort.
+    Only works on integers. Returns a NumPy int64 array sorted in ascending order.
     """
-    elap_time_ms = float(elap_time) * 1000000
-    if SHOW_RUNTIMES:
-        # NOTE: Microseconds (µs) are a millionth of a second.
-        unit_type_label = "microseconds"
-        # FEATURE: Display text a fixed number of characters to achieve vertical alignment:
-        # TODO: Print elap_time with leading spaces for a fixed vertical show:
-        print(f"{cur_batch} {task_in.ljust(14)} elap_time: {elap_time_ms:>8.4f} {unit_type_label}")
-
-    # Store in a matrix of a row for each run's x and y:
-    global results_x
-    global bubble_sort_results
-    global quicksort_results
-    global insertion_sort_results
-    global merge_sort_results
-    global timsort_results
-    global mtm_sort_results
-
-    if task_in == "Bubble sort":
-        bubble_sort_results.append(elap_time_ms)
-    elif task_in == "Quicksort":
-        quicksort_results.append(elap_time_ms)
-    elif task_in == "Insertion sort":
-        insertion_sort_results.append(elap_time_ms)
-    elif task_in == "Merge sort":
-        merge_sort_results.append(elap_time_ms)
-    elif task_in == "Timsort":
-        timsort_results.append(elap_time_ms)
-    elif task_in == "MTM sort":
-        mtm_sort_results.append(elap_time_ms)
-    else:
-        print(f"task_in \"{task_in}\" not found. Programming error.")
-        exit(9)
-    if SHOW_RESULTS_CALCS:
-        print(f"{task_in} => {task_in} => {elap_time_ms}")
+    values = np.asarray(array, dtype=np.int64)
+    if values.size < 2:
+        return values.copy()
+    low = values.min()
+    keys = (values - low).astype(np.uint64)   # Offset so negative numbers sort too.
+    key_bits = int(keys.max()).bit_length()
+    mask = np.uint64((1 << bits_per_digit) - 1)
+    for shift in range(0, key_bits, bits_per_digit):
+        digits = ((keys >> np.uint64(shift)) & mask).astype(np.uint16)
+        keys = keys[np.argsort(digits, kind="stable")]
+    return keys.astype(np.int64) + low
+
+
+def numpy_sort(array, kind="quicksort"):
+    """Sort with NumPy's compiled np.sort(): kind is "quicksort" (introsort), "stable" or "heapsort".
+
+    The conversion from a Python list is included in the time, as any caller would pay it.
+    Returns a NumPy int64 array sorted in ascending order.
+    """
+    return np.sort(np.asarray(array, dtype=np.int64), kind=kind)
 
 
-def plot_multiple_lines(x1,bubble_sort_results, merge_sort_results, quicksort_results, mtm_sort_results):
-    """Plot multiple lines.
+# The pool is kept across batches because each worker re-imports this module on start-up:
+_process_pool = None
+_process_pool_workers = 0
 
-    See https://matplotlib.org/stable/tutorials/pyplot.html
-    and https://www.w3schools.com/python/matplotlib_line.asp
+
+def get_process_pool(num_procs):
+    """Return a pool of num_procs worker processes, created on first use."""
+    global _process_pool
+    global _process_pool_workers
+    if _process_pool is None or _process_pool_workers != num_procs:
+        if _process_pool is not None:
+            _process_pool.shutdown()
+        _process_pool = ProcessPoolExecutor(max_workers=num_procs)
+        _process_pool_workers = num_procs
+    return _process_pool
+
+
+def shutdown_process_pool():
+    """Stop the worker processes started by get_process_pool()."""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown()
+        _process_pool = None
+
+
+def _sort_shared_chunk(shm_name, length, left, right):
+    """Sort elements left..right-1 of the int64 shared memory block in place.
+
+    Used by both multi_process_merge_sort() and parallel_sample_sort().
+    Runs inside a worker process. Only the block name and indexes are pickled,
+    never the numbers themselves.
     """
-    # Generate data for 4 lines
-    plt.title(f"BigO Time Complexity by sorting.py on {RANDOMNESS} data")
-    plt.ylabel('y = Microseconds Run Time')
-    plt.xlabel(f"x = N elements (growing geometrically within {len(x1)} batches)")
-
-    # no marker='o':
-    plt.plot(x1, bubble_sort_results, label='Bubble sort')
-    plt.plot(x1, quicksort_results, label='Quicksort')
-    plt.plot(x1, insertion_sort_results, label='Insertion sort')
-    plt.plot(x1, merge_sort_results, label='Merge sort')
-    plt.plot(x1, mtm_sort_results, label='MTM sort')
-    #plt.plot(x1, timsort_results, label='Timsort')
-
-    # Calculate positions of floating text:
-
-    if SHOW_RUNTIMES_IN_FUNC:
-       print(f"x1={str(x1)}")
-    last_x1_index = len(x1) -1
-    last_x1 = int(x1[last_x1_index]) -20
+    shm = shared_memory.SharedMemory(name=shm_name)
+    shared = None
+    try:
+        shared = np.ndarray((length,), dtype=np.int64, buffer=shm.buf)
+        shared[left:right] = merge_sort(shared[left:right].tolist())
+    finally:
+        shared = None  # Release the buffer before close() or it raises BufferError.
+        shm.close()
+    return right - left
+
+
+def multi_process_merge_sort(arr, num_procs=None):
+    """Multi-process merge sort using every CPU core (not limited by the GIL like threads).
+
+    The list is copied once into a shared memory block of int64.
+    Each worker process sorts its own chunk of that block in place with merge_sort().
+    The sorted chunks (runs) are then combined in a single k-way heap merge
+    (heapq.merge) rather than rounds of pairwise merge() calls.
+    Returns a new list with the numbers sorted in ascending order.
+    """
+    if num_procs is None:
+        num_procs = os.cpu_count() or 1
+    n = len(arr)
+    if num_procs <= 1 or n < 2:
+        return merge_sort(list(arr))
+
+    chunk_size = -(-n // num_procs)  # Ceiling division so no more than num_procs chunks.
+    bounds = [(left, min(left + chunk_size, n)) for left in range(0, n, chunk_size)]
     if SHOW_RESULTS_CALCS:
-       print(f"last_x1_index = {last_x1_index}")
-       print(f"last_x1 = {last_x1}")
+        print(f"len(arr)={n} / num_procs={num_procs} = chunk_size={chunk_size}")
+
+    shm = shared_memory.SharedMemory(create=True, size=n * np.dtype(np.int64).itemsize)
+    shared = None
+    try:
+        shared = np.ndarray((n,), dtype=np.int64, buffer=shm.buf)
+        shared[:] = arr
+        pool = get_process_pool(num_procs)
+        futures = [pool.submit(_sort_shared_chunk, shm.name, n, left, right)
+                   for left, right in bounds]
+        for future in futures:
+            future.result()  # Re-raise any exception from a worker.
+        runs = [shared[left:right].tolist() for left, right in bounds]
+    finally:
+        shared = None  # Release the buffer before close(), even on error, or close() raises BufferError.
+        shm.close()
+        shm.unlink()
+
+    return list(heapq.merge(*runs))
+
+
+SAMPLES_PER_BUCKET = 32   # Oversampling makes the splitters closer to true quantiles.
+# Bucket sizes of the last parallel_sample_sort() call, for reporting skew:
+last_bucket_sizes = []
+
+
+def parallel_sample_sort(arr, num_procs=None):
+    """Parallel Sample Sort across processes, with no merge phase at the end.
+
+    Chunk-then-merge (multi_process_merge_sort) ends with a serial merge of every element.
+    Sample sort instead:
+    1. Picks num_procs-1 splitters from a sorted random sample of the list.
+    2. Partitions the list into num_procs buckets with np.searchsorted, so every key
+       in bucket i is <= every key in bucket i+1.
+    3. Sorts the buckets concurrently in the process pool (shared memory, as in MP sort).
+    4. Returns the buckets as they lie, already concatenated in order.
+    Sizes of the buckets are kept in last_bucket_sizes; see bucket_skew().
+    """
+    global last_bucket_sizes
+    if num_procs is None:
+        num_procs = os.cpu_count() or 1
+    values = np.asarray(arr, dtype=np.int64)
+    n = values.size
+    if num_procs <= 1 or n < 2 * num_procs:
+        last_bucket_sizes = [n]
+        return merge_sort(values.tolist())
+
+    rng = np.random.default_rng()
+    sample = np.sort(rng.choice(values, size=min(n, num_procs * SAMPLES_PER_BUCKET), replace=False))
+    splitters = sample[np.linspace(0, sample.size, num_procs + 1, dtype=np.int64)[1:-1]]
+    bucket_ids = np.searchsorted(splitters, values, side="right").astype(np.uint16)
+    bucket_sizes = np.bincount(bucket_ids, minlength=num_procs)
+    last_bucket_sizes = bucket_sizes.tolist()
+    bucket_ends = np.cumsum(bucket_sizes).tolist()
+    bounds = [(end - size, end) for size, end in zip(last_bucket_sizes, bucket_ends) if size]
+
+    shm = shared_memory.SharedMemory(create=True, size=n * np.dtype(np.int64).itemsize)
+    shared = None
+    try:
+        shared = np.ndarray((n,), dtype=np.int64, buffer=shm.buf)
+        # Stable sort of small bucket numbers is a linear-time radix sort inside NumPy:
+        shared[:] = values[np.argsort(bucket_ids, kind="stable")]
+        pool = get_process_pool(num_procs)
+        futures = [pool.submit(_sort_shared_chunk, shm.name, n, left, right)
+                   for left, right in bounds]
+        for future in futures:
+            future.result()  # Re-raise any exception from a worker.
+        sorted_list = shared.tolist()
+    finally:
+        shared = None  # Release the buffer before close(), even on error, or close() raises BufferError.
+        shm.close()
+        shm.unlink()
+    return sorted_list
 
-    last_bubble_sort_index = len(bubble_sort_results) -1
-    last_bubble_sort_y = int(bubble_sort_results[last_bubble_sort_index]) +0.5
-    if SHOW_RESULTS_CALCS:
-       print(f"last_bubble_sort_index = {last_bubble_sort_index}")
-       print(f"last_bubble_sort_y = {last_bubble_sort_y}")
-    plt.text(last_x1, last_bubble_sort_y, "Bubble sort O(n)", fontsize=12, ha='center', va='center',
-            bbox=dict(facecolor='white', edgecolor='white', alpha=0.7))
 
-    # At upper-left corner:
-    current_date = datetime.now()
-    run_date = current_date.strftime("%Y-%m-%d %H:%M:%S")
-    plt.text(50, last_bubble_sort_y, run_date, fontsize=12, ha='center', va='center',
-           bbox=dict(facecolor='white', edgecolor='white', alpha=0.7))
+def bucket_skew(bucket_sizes):
+    """Return largest bucket / average bucket size: 1.0 means perfectly balanced workers."""
+    if not bucket_sizes or sum(bucket_sizes) == 0:
+        return 1.0
+    return max(bucket_sizes) / (sum(bucket_sizes) / len(bucket_sizes))
 
-    last_quicksort_index = len(quicksort_results) -1
-    last_quicksort_y = int(quicksort_results[last_quicksort_index] * 0.5)
-    if SHOW_RESULTS_CALCS:
-       print(f"last_quicksort_index = {last_quicksort_index}")
-       print(f"last_quicksort_y = {last_quicksort_y}")
-    plt.text(last_x1, last_quicksort_y, "Quicksort O(logN)", fontsize=12, ha='center', va='center',
-            bbox=dict(facecolor='white', edgecolor='white', alpha=0.7))
 
-    last_insertion_sort_index = len(insertion_sort_results) -1
-    last_insertion_sort_y = int(insertion_sort_results[last_insertion_sort_index] * 1.1)
-    if SHOW_RESULTS_CALCS:
-       print(f"last_insertion_sort_index = {last_insertion_sort_index}")
-       print(f"last_insertion_sort_y = {last_insertion_sort_y}")
-    plt.text(last_x1, last_insertion_sort_y, "Insertion sort", fontsize=12, ha='center', va='center',
-            bbox=dict(facecolor='white', edgecolor='white', alpha=0.7))
+# Input distributions: each is built with one vectorised NumPy call rather than a loop
+# of random.randint() calls. Values are integers from 1 to about n+1 like the original lists.
+FEW_UNIQUE_VALUES = 8   # Distinct values in few_unique input.
+SAWTOOTH_TEETH = 8      # Ascending ramps in sawtooth input.
 
-    last_merge_sort_index = len(merge_sort_results) -1
-    last_merge_sort_y = int(merge_sort_results[last_merge_sort_index] * 1.2)
-    if SHOW_RESULTS_CALCS:
-       print(f"last_merge_sort_index = {last_merge_sort_index}")
-       print(f"last_merge_sort_y = {last_merge_sort_y}")
-    plt.text(last_x1, last_merge_sort_y, "Merge sort O(logN)", fontsize=12, ha='center', va='center',
-            bbox=dict(facecolor='white', edgecolor='white', alpha=0.7))
 
-    last_mtm_sort_index = len(mtm_sort_results) -1
-    last_mtm_sort_y = int(mtm_sort_results[last_mtm_sort_index] * 1.2)
-    if SHOW_RESULTS_CALCS:
-       print(f"last_mtm_sort_index = {last_mtm_sort_index}")
-       print(f"last_mtm_sort_y = {last_mtm_sort_y}")
-    plt.text(last_x1, last_mtm_sort_y, "MTM sort O(?logN)", fontsize=12, ha='center', va='center',
-            bbox=dict(facecolor='white', edgecolor='white', alpha=0.7))
+def generate_input(distribution, n, rng, swaps=None):
+    """Return a NumPy int64 array of n elements shaped as distribution.
+
+    rng is a numpy.random.Generator, so the same seed gives the same data.
+    swaps is the number of random pairs swapped in nearly_sorted input (default 1% of n).
+    """
+    if distribution == "random":
+        return rng.integers(1, n + 2, size=n, dtype=np.int64)
+    if distribution == "sorted":
+        return np.arange(1, n + 1, dtype=np.int64)
+    if distribution == "reversed":
+        return np.arange(n, 0, -1, dtype=np.int64)
+    if distribution == "few_unique":
+        return rng.integers(1, FEW_UNIQUE_VALUES + 1, size=n, dtype=np.int64)
+    if distribution == "nearly_sorted":
+        values = np.arange(1, n + 1, dtype=np.int64)
+        if swaps is None:
+            swaps = max(n // 100, 1)
+        swaps = min(swaps, n // 2)
+        # Distinct positions, so every swap really moves two elements:
+        positions = rng.choice(n, size=2 * swaps, replace=False)
+        left, right = positions[:swaps], positions[swaps:]
+        values[left], values[right] = values[right], values[left].copy()
+        return values
+    if distribution == "organ_pipe":
+        # Up then down: 1 2 3 4 4 3 2 1
+        half = (n + 1) // 2
+        return np.concatenate((np.arange(1, half + 1), np.arange(n - half, 0, -1))).astype(np.int64)
+    if distribution == "sawtooth":
+        # Repeated ramps: 1 2 3 1 2 3 1 2 3
+        tooth = max(-(-n // SAWTOOTH_TEETH), 1)
+        return np.arange(n, dtype=np.int64) % tooth + 1
+    raise ValueError(f"Unknown input distribution \"{distribution}\"")
+
+
+# Names accepted by -d/--distribution, with what each looks like:
+INPUT_DISTRIBUTIONS = {
+    "random": "uniform random integers",
+    "sorted": "already sorted ascending",
+    "reversed": "sorted descending",
+    "few_unique": f"only {FEW_UNIQUE_VALUES} distinct values",
+    "nearly_sorted": "sorted, then a few random pairs swapped",
+    "organ_pipe": "ascending then descending",
+    "sawtooth": f"{SAWTOOTH_TEETH} ascending ramps",
+}
+
+
+# External (out-of-core) merge sort of files bigger than memory:
+# Runs are written as packed native int64 ("q") binary files.
+RUN_ITEM_BYTES = 8
+OUTPUT_BUFFER_ELEMENTS = 65536
+
+
+def parse_size(size_text):
+    """Convert "512K", "64M", "2G" or a plain number of bytes to an int number of bytes."""
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    size_text = str(size_text).strip().upper().removesuffix("B")
+    if size_text and size_text[-1] in units:
+        return int(float(size_text[:-1]) * units[size_text[-1]])
+    return int(size_text)
+
+
+def read_key_chunks(input_path, chunk_elements, key_column=0, stats=None):
+    """Yield NumPy int64 arrays of up to chunk_elements keys read from input_path.
+
+    Files ending in .bin are packed native int64. Anything else is read as CSV text
+    with the integer key in column key_column; a first row that is not a number is a header.
+    CSV keys go straight into a preallocated int64 array (8 bytes each) rather than
+    a list of Python ints, so a chunk costs what external_sort() sized it for.
+    """
+    if input_path.endswith(".bin"):
+        with open(input_path, "rb") as input_file:
+            while True:
+                chunk = np.fromfile(input_file, dtype=np.int64, count=chunk_elements)
+                if chunk.size == 0:
+                    return
+                if stats is not None:
+                    stats["bytes_read"] += chunk.nbytes
+                yield chunk
+    else:
+        with open(input_path, "rb") as input_file:
+            def decoded_lines():
+                # Count the bytes of each line as stored (quotes, multibyte text, \r\n):
+                for line in input_file:
+                    if stats is not None:
+                        stats["bytes_read"] += len(line)
+                    yield line.decode("utf-8")
+
+            keys = np.empty(chunk_elements, dtype=np.int64)
+            count = 0
+            for row_number, row in enumerate(csv.reader(decoded_lines())):
+                if not row:
+                    continue
+                try:
+                    keys[count] = int(row[key_column])
+                except ValueError:
+                    if row_number == 0:
+                        continue  # Header row.
+                    raise
+                count += 1
+                if count == chunk_elements:
+                    yield keys
+                    keys = np.empty(chunk_elements, dtype=np.int64)
+                    count = 0
+            if count:
+                yield keys[:count]
+
+
+def write_run(sorted_values, run_dir, stats):
+    """Write one sorted run as packed int64 to a new temp file and return its path."""
+    with tempfile.NamedTemporaryFile(dir=run_dir, prefix="run-", suffix=".bin", delete=False) as run_file:
+        values = np.asarray(sorted_values, dtype=np.int64)
+        values.tofile(run_file)
+    stats["bytes_written"] += values.nbytes
+    return run_file.name
+
+
+def iter_run(run_path, stats):
+    """Yield the int64 values of a run file through a read-only memory map."""
+    with open(run_path, "rb") as run_file, \
+         mmap.mmap(run_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        stats["bytes_read"] += len(mapped)
+        with memoryview(mapped) as view, view.cast("q") as values:
+            yield from values
+
+
+def merge_run_files(run_paths, output_path, stats, as_text=False):
+    """K-way merge the sorted run files into output_path using heapq.merge."""
+    buffer = typed_array("q")
+    mode = "w" if as_text else "wb"
+    with open(output_path, mode, encoding="utf-8" if as_text else None) as output_file:
+        def flush():
+            if as_text:
+                text = "".join(f"{value}\n" for value in buffer)
+                output_file.write(text)
+                stats["bytes_written"] += len(text)
+            else:
+                buffer.tofile(output_file)
+                stats["bytes_written"] += len(buffer) * RUN_ITEM_BYTES
+            del buffer[:]
+
+        for value in heapq.merge(*(iter_run(run_path, stats) for run_path in run_paths)):
+            buffer.append(value)
+            if len(buffer) >= OUTPUT_BUFFER_ELEMENTS:
+                flush()
+        flush()
+
+
+def external_sort(input_path, output_path, sort_func, mem_limit, bytes_per_element=16,
+                  key_column=0, fan_in=64, tmp_dir=None):
+    """Sort integer keys in a file larger than memory (external merge sort).
+
+    1. Read chunks small enough for mem_limit bytes and sort each with sort_func
+       (any function in SORT_ALGORITHMS), writing each as a sorted run file.
+    2. Merge up to fan_in runs at a time with heapq.merge over memory-mapped runs,
+       repeating passes until one output remains.
+    bytes_per_element estimates the memory one key costs while sort_func sorts it.
+    Output ending in .bin is packed int64, otherwise one number per text line.
+    Returns a dict of elements, runs, merge_passes, bytes_read, bytes_written.
+    """
+    chunk_elements = max(mem_limit // bytes_per_element, 1)
+    stats = {"elements": 0, "runs": 0, "merge_passes": 0, "bytes_read": 0, "bytes_written": 0}
+    run_dir = tempfile.mkdtemp(prefix="sorting-runs-", dir=tmp_dir)
+    try:
+        run_paths = []
+        for chunk in read_key_chunks(input_path, chunk_elements, key_column, stats):
+            run_paths.append(write_run(sort_func(chunk), run_dir, stats))
+            stats["elements"] += len(chunk)
+        stats["runs"] = len(run_paths)
+        if SHOW_ITERATION:
+            print(f"*** {stats['elements']:,} keys in {stats['runs']} runs of up to {chunk_elements:,}")
+
+        # Intermediate passes until the last pass can merge every remaining run:
+        while len(run_paths) > fan_in:
+            next_paths = []
+            for first in range(0, len(run_paths), fan_in):
+                group = run_paths[first:first + fan_in]
+                merged_path = os.path.join(run_dir, f"pass{stats['merge_passes']}-{first}.bin")
+                merge_run_files(group, merged_path, stats)
+                for run_path in group:
+                    os.remove(run_path)
+                next_paths.append(merged_path)
+            run_paths = next_paths
+            stats["merge_passes"] += 1
+
+        merge_run_files(run_paths, output_path, stats, as_text=not output_path.endswith(".bin"))
+        stats["merge_passes"] += 1
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+    return stats
+
+
+# Algorithm registry: CLI key -> (report label, function that returns a sorted list).
+# Insertion order is report order. Algorithms added here are run in every batch.
+SORT_ALGORITHMS = {
+    "bubble": ("Bubble sort", bubble_sort),
+    "insertion": ("Insertion sort", insertion_sort),
+    "quick": ("Quicksort", quicksort),
+    "heap": ("Heapsort", heapsort),
+    "merge": ("Merge sort", merge_sort),
+    "merge_bu": ("Merge sort BU", merge_sort_bottom_up),   # Bottom-up, one buffer.
+    "mp": ("MP sort", multi_process_merge_sort),
+    "sample": ("Sample sort", parallel_sample_sort),   # Also across processes.
+    "timsort": ("Timsort", sorted),   # Python's built-in.
+    # Integer-only algorithms (O(n + k) and O(n * digits)):
+    "counting": ("Counting sort", counting_sort),
+    "radix": ("Radix sort", radix_sort),
+    # NumPy compiled backends, which leave pure Python behind as n grows past 2^20:
+    "np_quick": ("np.sort quick", functools.partial(numpy_sort, kind="quicksort")),
+    "np_stable": ("np.sort stable", functools.partial(numpy_sort, kind="stable")),
+}
+# Keys of algorithms that work on NumPy arrays without making Python int objects:
+NUMPY_ALGORITHMS = {"radix", "np_quick", "np_stable"}
+
+# Columns of each row of results, in the order written to CSV:
+RESULT_FIELDS = ["batch", "n", "input", "algorithm", "runs",
+                 "min_us", "median_us", "p95_us", "stddev_us",
+                 "status", "model", "predicted_s", "peak_kb", "retained_blocks"]
+
+# Time complexity models fitted to timings to predict the cost of the next batch:
+COMPLEXITY_MODELS = {
+    "O(n)": lambda n: n,
+    "O(n log n)": lambda n: n * math.log2(max(n, 2)),
+    "O(n^2)": lambda n: n * n,
+}
+FIT_POINTS = 4   # Fit only the largest batches, as small ones are mostly call overhead.
+
+
+def benchmark_sort(sort_func, data, warmup=1, repeat=5):
+    """Time sort_func with warmup runs (not timed) followed by repeat timed runs.
+
+    Each run gets its own copy of data because some algorithms (insertion_sort) sort in place.
+    Returns a list of elapsed seconds per timed run, and the sorted list of the last run.
+    """
+    for _ in range(warmup):
+        sort_func(list(data))
+    samples = []
+    sorted_list = None
+    for _ in range(max(repeat, 1)):
+        work_list = list(data)
+        strt_time = timeit.default_timer()
+        sorted_list = sort_func(work_list)
+        samples.append(timeit.default_timer() - strt_time)
+    return samples, sorted_list
+
 
-    # TODO: At lower-right corner: timsort()
+def measure_memory(sort_func, data):
+    """Run sort_func once under tracemalloc and return (peak_kb, retained_blocks).
+
+    Kept apart from the timed runs because tracing every allocation slows the sort.
+    peak_kb is the most memory allocated at any moment beyond the input list itself,
+    so an in-place sort like insertion_sort shows almost none while merge_sort shows its copies.
+    retained_blocks is the number of memory blocks the sort allocated and still holds
+    when it returns (tracemalloc does not count blocks that were already freed).
+    Shared memory used by MP sort workers is not traced.
+    """
+    work_list = list(data)
+    tracemalloc.start()
+    try:
+        sorted_list = sort_func(work_list)
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    del sorted_list
+    retained_blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+    return peak / 1024, retained_blocks
+
+
+def _forget_process_pool():
+    """Drop the _process_pool a forked worker inherited: its management thread was not copied."""
+    global _process_pool
+    _process_pool = None
+
+
+def _measure_memory_worker(sort_func, data):
+    """Run measure_memory() inside the isolated process, then stop any pool the sort started there."""
+    try:
+        return measure_memory(sort_func, data)
+    finally:
+        shutdown_process_pool()
+
+
+def measure_memory_isolated(sort_func, data):
+    """Run measure_memory() in a new process so earlier runs (caches, freed arenas) don't affect it.
+
+    A forked process inherits the cached _process_pool of the timed runs without the thread
+    that manages it, so MP and sample sort would wait forever on it; the initializer drops it.
+    """
+    with ProcessPoolExecutor(max_workers=1, initializer=_forget_process_pool) as pool:
+        return pool.submit(_measure_memory_worker, sort_func, data).result()
+
+
+def summarize_samples(samples):
+    """Return min/median/p95/stddev of elapsed seconds, converted to microseconds."""
+    samples_us = [sample * 1000000 for sample in samples]
+    if len(samples_us) > 1:
+        p95_us = statistics.quantiles(samples_us, n=100, method="inclusive")[94]
+        stddev_us = statistics.stdev(samples_us)
+    else:
+        p95_us = samples_us[0]
+        stddev_us = 0.0
+    return {
+        "runs": len(samples_us),
+        "min_us": min(samples_us),
+        "median_us": statistics.median(samples_us),
+        "p95_us": p95_us,
+        "stddev_us": stddev_us,
+    }
+
+
+def fit_complexity(timings):
+    """Return the name of the COMPLEXITY_MODELS entry that best explains how run time grows.
+
+    timings is a list of (n, seconds) from earlier batches.
+    Each model is scored on how well it predicts the growth from one batch to the next
+    (squared error of the log of the ratios), so the constant factor does not matter.
+    Returns None until there are at least 2 timings to compare.
+    """
+    points = sorted((n, seconds) for n, seconds in timings if seconds > 0)[-FIT_POINTS:]
+    if len(points) < 2:
+        return None
+    best_model = None
+    best_error = None
+    for model, model_func in COMPLEXITY_MODELS.items():
+        error = 0.0
+        for (n1, seconds1), (n2, seconds2) in itertools.pairwise(points):
+            error += (math.log(seconds2 / seconds1) - math.log(model_func(n2) / model_func(n1))) ** 2
+        if best_error is None or error < best_error:
+            best_model = model
+            best_error = error
+    return best_model
+
+
+def predict_seconds(timings, model, n):
+    """Predict seconds for one run on n elements by scaling the largest timing by the model."""
+    n_last, seconds_last = max(timings)
+    model_func = COMPLEXITY_MODELS[model]
+    return seconds_last * model_func(n) / model_func(n_last)
+
+
+def parse_budgets(budget_args, parser):
+    """Split --budget values into a global default and per-algorithm seconds.
+
+    --budget 60 bubble=5 insertion=10  returns (60.0, {"bubble": 5.0, "insertion": 10.0})
+    """
+    default_budget = None
+    algorithm_budgets = {}
+    for budget_arg in budget_args or []:
+        key, _, seconds = budget_arg.rpartition("=")
+        try:
+            seconds = float(seconds)
+        except ValueError:
+            parser.error(f"--budget {budget_arg}: seconds must be a number")
+        if not key:
+            default_budget = seconds
+        elif key in SORT_ALGORITHMS:
+            algorithm_budgets[key] = seconds
+        else:
+            parser.error(f"--budget {budget_arg}: unknown algorithm \"{key}\"")
+    return default_budget, algorithm_budgets
 
-    # TODO: mtm_sort
 
-    # Adjust the layout to make room for the footer:
-#   plt.tight_layout()
+def report_elap_time(cur_batch, task_in, stats):
+    """Print vertical columns of human-readable run times in microseconds.
 
-    # plt.legend()
+    8 Bubble sort    min:  1302.1 median:  1390.3 p95:  1522.9 stddev:    81.4 microseconds
+    8 Insertion sort min:   801.7 median:   832.6 p95:   901.2 stddev:    33.0 microseconds
+    """
+    if SHOW_RUNTIMES:
+        # NOTE: Microseconds (µs) are a millionth of a second.
+        unit_type_label = "microseconds"
+        # FEATURE: Display text a fixed number of characters to achieve vertical alignment:
+        print(f"{cur_batch} {task_in.ljust(14)}"
+              f" min: {stats['min_us']:>11.1f}"
+              f" median: {stats['median_us']:>11.1f}"
+              f" p95: {stats['p95_us']:>11.1f}"
+              f" stddev: {stats['stddev_us']:>9.1f} {unit_type_label}")
+        if stats.get("peak_kb") is not None:
+            print(f"{' ' * (len(str(cur_batch)) + 15)} peak: {stats['peak_kb']:>11.1f} KB"
+                  f" retained blocks: {stats['retained_blocks']:,}")
+    if SHOW_RESULTS_CALCS:
+        print(f"{task_in} => {stats}")
 
-    #plt.plot(y2, marker = '*')
 
-    # Display the plot
+def write_results_json(filepath, results, settings):
+    """Write run settings and result rows to a JSON file that --compare can read back."""
+    now_utc = datetime.now(timezone.utc)
+    document = {
+        "program": "sorting.py",
+        "last_change": __last_change__,
+        "run_date": now_utc.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "settings": settings,
+        "results": results,
+    }
+    with open(filepath, "w", encoding="utf-8") as json_file:
+        json.dump(document, json_file, indent=2)
+
+
+def write_results_csv(filepath, results):
+    """Write result rows to a CSV file with a header line."""
+    with open(filepath, "w", newline="", encoding="utf-8") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def compare_to_baseline(results, baseline_path, threshold=0.10):
+    """Flag results whose median is more than threshold (0.10 = 10%) slower than the baseline.
+
+    Rows are matched on algorithm, input type and number of elements.
+    Returns a list of (row, baseline_median_us) for each regression found.
+    """
+    with open(baseline_path, encoding="utf-8") as json_file:
+        baseline = json.load(json_file)
+    baseline_medians = {(row["algorithm"], row["input"], row["n"]): row["median_us"]
+                        for row in baseline["results"] if row.get("median_us")}
+    print(f"*** Compare to {baseline_path} ({baseline.get('run_date', 'unknown date')}),"
+          f" threshold {threshold:.0%}:")
+    regressions = []
+    for row in results:
+        baseline_median = baseline_medians.get((row["algorithm"], row["input"], row["n"]))
+        if not baseline_median or row["median_us"] is None:
+            continue
+        change = row["median_us"] / baseline_median - 1
+        flag = ""
+        if change > threshold:
+            flag = "REGRESSION"
+            regressions.append((row, baseline_median))
+        if flag or SHOW_RUNTIMES:
+            print(f"{row['batch']} {row['algorithm'].ljust(14)} n={row['n']:<9}"
+                  f" {baseline_median:>11.1f} -> {row['median_us']:>11.1f} microseconds"
+                  f" {change:>+8.1%} {flag}")
+    print(f"*** {len(regressions)} regression(s) found.")
+    return regressions
+
+
+def plot_skipped_runs(ax, results, palette=None):
+    """Mark runs skipped by --budget with an x along the top edge of the plot.
+
+    The first skip of each algorithm is listed below the run date with its "skipped (predicted Xs)" status.
+    Predicted times are not plotted as points because they would stretch the y axis.
+    """
+    labels = {}
+    for row in results:
+        if row["status"] == "ok":
+            continue
+        color = palette[row["algorithm"]] if palette else None
+        # x in data coordinates, y as a fraction of the axes height:
+        ax.plot(row["n"], 0.98, marker="x", color=color, transform=ax.get_xaxis_transform())
+        labels.setdefault(row["algorithm"], f"{row['algorithm']} at n={row['n']:,} {row['status']}")
+    if labels:
+        ax.text(0.02, 0.88, "\n".join(labels.values()), fontsize=9, va='top', ha='left',
+                transform=ax.transAxes)
+
+
+def plot_multiple_lines(results):
+    """Plot a line of median run time per algorithm using Matplotlib only.
+
+    See https://matplotlib.org/stable/tutorials/pyplot.html
+    and https://www.w3schools.com/python/matplotlib_line.asp
+    """
+    plt.title(f"BigO Time Complexity by sorting.py on {RANDOMNESS} data")
+    plt.ylabel('y = Microseconds Run Time (median)')
+    batches = sorted({row["n"] for row in results})
+    plt.xlabel(f"x = N elements (growing geometrically within {len(batches)} batches)")
+
+    measured = [row for row in results if row["status"] == "ok"]
+    for algorithm, distribution in dict.fromkeys((row["algorithm"], row["input"]) for row in measured):
+        rows = [row for row in measured if row["algorithm"] == algorithm and row["input"] == distribution]
+        x1 = [row["n"] for row in rows]
+        y1 = [row["median_us"] for row in rows]
+        line_label = f"{algorithm} ({distribution})"
+        # no marker='o':
+        plt.plot(x1, y1, label=line_label)
+        # Label each line at its last point:
+        plt.text(x1[-1], y1[-1], line_label, fontsize=12, ha='right', va='bottom',
+                 bbox=dict(facecolor='white', edgecolor='white', alpha=0.7))
+    plot_skipped_runs(plt.gca(), results)
+
+    # At upper-left corner:
+    run_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    plt.text(0.02, 0.95, run_date, fontsize=12, ha='left', va='top', transform=plt.gca().transAxes,
+             bbox=dict(facecolor='white', edgecolor='white', alpha=0.7))
+    plt.legend()
     plt.show()
-#def plot_joint_seaborn(results_x, bubble_sort_results, merge_sort_results, quicksort_results, mtm_sort_results):
-def plot_joint_seaborn(x2, bubble_sort_results, merge_sort_results, quicksort_results, mtm_sort_results):
-    """Annotate text in a dynamic way overlaps text hence used Legend in the figure.
 
+
+def plot_joint_seaborn(results):
+    """Plot median run time per algorithm (min to p95 shaded) beside peak memory, with Legends.
+
+    Annotating text in a dynamic way overlaps text, hence the Legend.
+    The memory panel is drawn only when --memory was not off.
     See https://seaborn.pydata.org/tutorial/relational.html#relational-tutorial
     """
-    column_names = [x2,bubble_sort_results, merge_sort_results, quicksort_results, mtm_sort_results]
-    dataframe = pd.DataFrame(column_names)
-    #transposed the dataset for plotting x -axis correctly
-    dataframet=dataframe.T
+    dataframe = pd.DataFrame(results)
+    algorithms = list(dict.fromkeys(dataframe["algorithm"]))
+    palette = dict(zip(algorithms, sns.color_palette(n_colors=len(algorithms))))
+    skipped = dataframe[dataframe["status"] != "ok"]
+    dataframe = dataframe[dataframe["status"] == "ok"]
+    show_memory = dataframe["peak_kb"].notna().any()
+
     sns.set_theme(style='darkgrid')
-    plt.title(f"BigO Time Complexity by sorting.py on {RANDOMNESS} data")
-    plt.ylabel('y = Microseconds Run Time')
-    plt.xlabel(f"x = N elements (growing geometrically within {len(x2)} batches)")
-    
-    # no marker='o':
-    plt.plot(x2, bubble_sort_results, label='Bubble sort')
-    plt.plot(x2, quicksort_results, label='Quicksort')
-    plt.plot(x2, insertion_sort_results, label='Insertion sort')
-    plt.plot(x2, merge_sort_results, label='Merge sort')
-    plt.plot(x2, mtm_sort_results, label='MTM sort')
-    
-
-    # Calculate positions of floating text:
-
-    if SHOW_RUNTIMES_IN_FUNC:
-       print(f"x={str(x2)}")
-    last_x2_index = len(x2) -1
-    last_x2 = int(x2[last_x2_index]) -20
+    if show_memory:
+        _, (ax, ax_memory) = plt.subplots(1, 2, figsize=(14, 6))
+    else:
+        _, ax = plt.subplots()
+    sns.lineplot(data=dataframe, x="n", y="median_us", hue="algorithm",
+                 style="input", palette=palette, marker="o", ax=ax)
+    # Spread between fastest and 95th percentile runs shows how noisy each median is:
+    for (algorithm, _), group in dataframe.groupby(["algorithm", "input"], sort=False):
+        ax.fill_between(group["n"], group["min_us"], group["p95_us"],
+                        color=palette[algorithm], alpha=0.2)
+    plot_skipped_runs(ax, skipped.to_dict("records"), palette)
     if SHOW_RESULTS_CALCS:
-       print(f"last_x2_index = {last_x2_index}")
-       print(f"last_x2 = {last_x2}")
+        print(dataframe)
 
-    last_bubble_sort_index = len(bubble_sort_results) -1
-    last_bubble_sort_y = int(bubble_sort_results[last_bubble_sort_index]) +0.5
-    if SHOW_RESULTS_CALCS:
-       print(f"last_bubble_sort_index = {last_bubble_sort_index}")
-       print(f"last_bubble_sort_y = {last_bubble_sort_y}")
-    #plt.annotate("Bubble sort O(n^2))",xy=(last_x2, last_bubble_sort_y),xytext=(last_x2, last_bubble_sort_y),va='center', ha='center')    
+    ax.set_title(f"BigO Time Complexity by sorting.py on {RANDOMNESS} data")
+    ax.set_ylabel('y = Microseconds Run Time (median, min to p95 shaded)')
+    ax.set_xlabel(f"x = N elements (growing geometrically within {dataframe['n'].nunique()} batches)")
 
     # At upper-left corner: Image captured at:
     # https://res.cloudinary.com/dcajqrroq/image/upload/v1757602240/sorting-587x456_kdocdc.png
     now_utc = datetime.now(timezone.utc)
     run_date = now_utc.strftime('%Y-%m-%dT%H:%M:%SZ')
-    plt.text(50, last_bubble_sort_y, run_date, fontsize=12, va='bottom',ha='left',
-           bbox=dict(facecolor='None', edgecolor='None', alpha=0.7))
-    
-
-    last_quicksort_index = len(quicksort_results) -1
-    last_quicksort_y = int(quicksort_results[last_quicksort_index] * 0.5)
-    if SHOW_RESULTS_CALCS:
-       print(f"last_quicksort_index = {last_quicksort_index}")
-       print(f"last_quicksort_y = {last_quicksort_y}")
-    #plt.annotate("Quicksort O(logN))",xy=(last_x2, last_quicksort_y),xytext=(last_x2, last_quicksort_y),va='center', ha='center')
-    last_insertion_sort_index = len(insertion_sort_results) -1
-    last_insertion_sort_y = int(insertion_sort_results[last_insertion_sort_index] * 1.1)
-    if SHOW_RESULTS_CALCS:
-       print(f"last_insertion_sort_index = {last_insertion_sort_index}")
-       print(f"last_insertion_sort_y = {last_insertion_sort_y}")
-    #plt.annotate("Insertion sort O(n)",xy=(last_x2, last_insertion_sort_y),xytext=(last_x2, last_insertion_sort_y),va='center', ha='center')
-    last_merge_sort_index = len(merge_sort_results) -1
-    last_merge_sort_y = int(merge_sort_results[last_merge_sort_index] * 1.2)
-    if SHOW_RESULTS_CALCS:
-       print(f"last_merge_sort_index = {last_merge_sort_index}")
-       print(f"last_merge_sort_y = {last_merge_sort_y}")
-    #plt.annotate("Merge sort O(logN)",xy=(last_x2, last_merge_sort_y),xytext=(last_x2, last_merge_sort_y),va='center', ha='center')
-    last_mtm_sort_index = len(mtm_sort_results) -1
-    last_mtm_sort_y = int(mtm_sort_results[last_mtm_sort_index] * 1.2)
-    if SHOW_RESULTS_CALCS:
-       print(f"last_mtm_sort_index = {last_mtm_sort_index}")
-       print(f"last_mtm_sort_y = {last_mtm_sort_y}")
-    #plt.annotate("MTM sort O(?logN)",xy=(last_x2, last_mtm_sort_y),xytext=(last_x2, last_mtm_sort_y),va='center', ha='center')
-    #
-    ax=sns.lineplot(data=dataframet,x=last_x2_index,y=x2)
+    ax.text(0.02, 0.95, run_date, fontsize=12, va='top', ha='left', transform=ax.transAxes,
+            bbox=dict(facecolor='None', edgecolor='None', alpha=0.7))
     ax.yaxis.set_major_formatter(mpl.ticker.StrMethodFormatter('{x:,.0f}'))
-    #sns.lineplot(data=dataframet,x=last_x2_index,y=x2)
+
+    if show_memory:
+        sns.lineplot(data=dataframe, x="n", y="peak_kb", hue="algorithm",
+                     style="input", palette=palette, marker="o", ax=ax_memory)
+        ax_memory.set_title("Space Complexity: tracemalloc peak beyond the input")
+        ax_memory.set_ylabel('y = KB peak memory')
+        ax_memory.set_xlabel("x = N elements")
+        ax_memory.yaxis.set_major_formatter(mpl.ticker.StrMethodFormatter('{x:,.0f}'))
+        plt.tight_layout()
     mpl.pyplot.show()
 
+
 if __name__ == "__main__":
 
     # TODO: SECTION 2 - A Results db is created to store runtimes for each complexity level invocation.
@@ -447,8 +1138,65 @@ if __name__ == "__main__":
         nargs="+",
         help="Batches"
     )
+    # USAGE: ./sorting.py -b 20 -p 8   to see MP sort speedup against core count.
+    parser.add_argument(
+        "-p", "--processes",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes for MP sort and Sample sort (default: all CPU cores, 1 = plain merge sort)"
+    )
+    # USAGE: ./sorting.py -b 12 -a merge mp timsort -r 7 --json baseline.json
+    parser.add_argument(
+        "-a", "--algorithms",
+        nargs="+",
+        choices=list(SORT_ALGORITHMS),
+        default=list(SORT_ALGORITHMS),
+        help="Algorithms to run (default: all)"
+    )
+    # USAGE: ./sorting.py -b 12 -d random nearly_sorted organ_pipe --seed 42
+    parser.add_argument(
+        "-d", "--distribution",
+        nargs="+",
+        choices=list(INPUT_DISTRIBUTIONS),
+        default=["random"],
+        help="Shapes of input data to sort in each batch (default: random)"
+    )
+    parser.add_argument("--seed", type=int, help="Seed for input data so runs can be repeated (default: new seed each run)")
+    parser.add_argument("--swaps", type=int, help="Swaps made in nearly_sorted input (default: 1%% of n)")
+    parser.add_argument("-w", "--warmup", type=int, default=1, help="Untimed warmup runs per algorithm per batch")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Timed runs per algorithm per batch")
+    parser.add_argument("--json", metavar="FILE", help="Write results to a JSON file")
+    parser.add_argument("--csv", metavar="FILE", help="Write results to a CSV file")
+    # USAGE: ./sorting.py -b 12 --compare baseline.json --threshold 0.2
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON file from an earlier --json run to flag regressions against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Slowdown of median flagged as regression (default 0.10 = 10%%)")
+    parser.add_argument("--no-plot", action='store_true', help="Do not display plot")
+    # USAGE: ./sorting.py -b 14 --memory subprocess   to measure each in a fresh process.
+    parser.add_argument(
+        "--memory",
+        choices=["off", "inline", "subprocess"],
+        default="inline",
+        help="Measure tracemalloc peak memory in one extra run per batch (default: inline)"
+    )
+    # USAGE: ./sorting.py -b 20 --budget 30 bubble=5   to skip runs predicted to take longer.
+    parser.add_argument(
+        "--budget",
+        nargs="+",
+        metavar="[ALGORITHM=]SECONDS",
+        help="Skip an algorithm once its next batch is predicted to take more seconds than this"
+    )
+    # USAGE: ./sorting.py --external keys.bin --output sorted.bin --mem-limit 256M -v
+    parser.add_argument("--external", metavar="INPUT", help="Sort a file of integer keys (.bin int64 or CSV) larger than memory")
+    parser.add_argument("--output", metavar="FILE", help="Sorted output of --external (default: INPUT.sorted, .bin = int64)")
+    parser.add_argument("--mem-limit", default="256M", help="Memory for each --external sorted run, e.g. 512K, 64M, 2G")
+    parser.add_argument("--external-algorithm", choices=list(SORT_ALGORITHMS), default="np_quick",
+                        help="Algorithm to sort each --external run in memory")
+    parser.add_argument("--key-column", type=int, default=0, help="CSV column of the --external integer key")
+    parser.add_argument("--fan-in", type=int, default=64, help="Most runs merged at once by --external")
+    parser.add_argument("--tmp-dir", help="Folder for --external run files (default: system temp)")
     args = parser.parse_args()
-    LIST_IS_RANDOM = True
+    # Shown in plot titles:
+    RANDOMNESS = ", ".join(args.distribution)
 
     SHOW_UNSORTED = False
     SHOW_SORTED = False
@@ -466,12 +1214,28 @@ if __name__ == "__main__":
         SHOW_ITERATION = False
         SHOW_RUNTIMES = False
 
-    SHOW_PLOTS = True
+    SHOW_PLOTS = not args.no_plot
     if args.quiet:
         SHOW_RESULTS_CALCS = True  # True or False
     else:
         SHOW_RESULTS_CALCS = False
 
+    if args.external:
+        output_path = args.output or f"{args.external}.sorted"
+        task_name, sort_func = SORT_ALGORITHMS[args.external_algorithm]
+        # Python int objects in a list cost far more than 8 bytes each:
+        bytes_per_element = 16 if args.external_algorithm in NUMPY_ALGORITHMS else 80
+        strt_time = timeit.default_timer()
+        stats = external_sort(args.external, output_path, sort_func, parse_size(args.mem_limit),
+                              bytes_per_element=bytes_per_element, key_column=args.key_column,
+                              fan_in=args.fan_in, tmp_dir=args.tmp_dir)
+        elap_time = timeit.default_timer() - strt_time
+        print(f"*** External sort ({task_name} runs) of {args.external} to {output_path}"
+              f" took {elap_time:,.3f} secs:")
+        print(f"    {stats['elements']:,} elements, {stats['runs']} runs, {stats['merge_passes']} merge passes,"
+              f" {stats['bytes_read']:,} bytes read, {stats['bytes_written']:,} bytes written.")
+        sys.exit(0)
+
     # Array of numbers increasing geometrically in base 2: 1,2,4,8,16,32,64,128,256,512, etc.
     array_elements_start = 2
     if args.batches:
@@ -483,85 +1247,106 @@ if __name__ == "__main__":
     if SHOW_UNSORTED:
         print(f"{num_of_batches} batches={str(batches_array)}")
 
-    # TODO: Stop when maximum run time threshold is reached.
+    # Stop running each algorithm when its predicted run time exceeds its budget:
+    default_budget, algorithm_budgets = parse_budgets(args.budget, parser)
+    memory_runs = 0 if args.memory == "off" else 1
+
+    # A seed is always recorded so any run can be reproduced with --seed:
+    seed = args.seed if args.seed is not None else int(np.random.SeedSequence().entropy % 2**32)
+    rng = np.random.default_rng(seed)
+    if SHOW_ITERATION:
+        print(f"*** Input {RANDOMNESS} generated with --seed {seed}")
+
+    SORT_ALGORITHMS["mp"] = ("MP sort", functools.partial(multi_process_merge_sort, num_procs=args.processes))
+    SORT_ALGORITHMS["sample"] = ("Sample sort", functools.partial(parallel_sample_sort, num_procs=args.processes))
 
-    # Initialize results across batches:
-    results_x = []
-    bubble_sort_results = []
-    quicksort_results = []
-    insertion_sort_results = []
-    merge_sort_results = []
-    timsort_results =[]
-    mtm_sort_results =[]
+    # One row per algorithm per batch, with fields in RESULT_FIELDS:
+    results = []
+    # (n, median seconds) of each (algorithm, distribution) for fitting COMPLEXITY_MODELS:
+    timings = {}
 
     cur_batch = 1
     for index, num_elements in enumerate(batches_array):
-        list_strt_value = 1    # Desired start value of range
-        list_max_value = num_elements - list_strt_value + 2
-
-        if LIST_IS_RANDOM:
-            RANDOMNESS = "random"
-            my_list = []  # initialize list
-            for _ in range(num_elements):
-                another_number = random.randint(list_strt_value, list_max_value)
-                my_list.append(another_number)
-        else:  # Construct sequential list:
-            RANDOMNESS = "sequential"   # already sorted!
-            if list_strt_value == 0:
-                list_max_value -= 2
-            # import numpy as np  # https://numpy.org/doc/stable/reference/generated/numpy.arange.html
-            my_list = np.arange(list_strt_value, list_max_value, 1 )
-        # TODO: Generate random numbers in Fibonocci seq.
-        if SHOW_UNSORTED:
-            print(f"{cur_batch} {RANDOMNESS} my_list={str(my_list)}")
-
-        list_element_count = len(my_list)    # within array for sorting
-        results_x.append(list_element_count)
-        if SHOW_ITERATION:
-            print(f"Run batch {cur_batch} of {list_element_count} {RANDOMNESS} elements:")
-               # {list_max_value} containing " +
-        if SHOW_UNSORTED:
-            print("Unsorted list: "+str(my_list))
-
-        task_name = "Bubble sort"
-        strt_time = timeit.default_timer()
-        sorted_list = bubble_sort(my_list)
-        report_elap_time(cur_batch, task_name, timeit.default_timer() - strt_time)
+        for distribution in args.distribution:
+            # TODO: Generate random numbers in Fibonocci seq.
+            my_list = generate_input(distribution, num_elements, rng, swaps=args.swaps).tolist()
+            if SHOW_UNSORTED:
+                print(f"{cur_batch} {distribution} my_list={str(my_list)}")
+
+            list_element_count = len(my_list)    # within array for sorting
+            if SHOW_ITERATION:
+                print(f"Run batch {cur_batch} of {list_element_count} {distribution} elements:")
+
+            expected_list = sorted(my_list)
+            for algorithm_key in args.algorithms:
+                task_name, sort_func = SORT_ALGORITHMS[algorithm_key]
+                algorithm_timings = timings.setdefault((algorithm_key, distribution), [])
+                model = fit_complexity(algorithm_timings)
+                budget = algorithm_budgets.get(algorithm_key, default_budget)
+                if model and budget is not None:
+                    predicted = predict_seconds(algorithm_timings, model, list_element_count)
+                    predicted_total = predicted * (args.warmup + args.repeat + memory_runs)
+                    if predicted_total > budget:
+                        status = f"skipped (predicted {predicted_total:.3g}s)"
+                        print(f"{cur_batch} {task_name.ljust(14)} {status} > budget {budget:.3g}s for {model}")
+                        results.append({"batch": cur_batch, "n": list_element_count,
+                                        "input": distribution, "algorithm": task_name, "runs": 0,
+                                        "min_us": None, "median_us": None, "p95_us": None,
+                                        "stddev_us": None, "status": status, "model": model,
+                                        "predicted_s": predicted_total,
+                                        "peak_kb": None, "retained_blocks": None})
+                        continue
+                samples, sorted_list = benchmark_sort(sort_func, my_list,
+                                                      warmup=args.warmup, repeat=args.repeat)
+                if list(sorted_list) != expected_list:
+                    print(f"{cur_batch} {task_name} returned an unsorted list. Programming error.")
+                    exit(9)
+                stats = summarize_samples(samples)
+                stats["peak_kb"] = stats["retained_blocks"] = None
+                if args.memory == "inline":
+                    stats["peak_kb"], stats["retained_blocks"] = measure_memory(sort_func, my_list)
+                elif args.memory == "subprocess":
+                    stats["peak_kb"], stats["retained_blocks"] = measure_memory_isolated(sort_func, my_list)
+                report_elap_time(cur_batch, task_name, stats)
+                if algorithm_key == "sample" and SHOW_RUNTIMES:
+                    print(f"{' ' * (len(str(cur_batch)) + 15)} {len(last_bucket_sizes)} buckets"
+                          f" of {min(last_bucket_sizes):,} to {max(last_bucket_sizes):,}"
+                          f" elements, skew {bucket_skew(last_bucket_sizes):.2f}")
+                algorithm_timings.append((list_element_count, stats["median_us"] / 1000000))
+                results.append({"batch": cur_batch, "n": list_element_count,
+                                "input": distribution, "algorithm": task_name, **stats,
+                                "status": "ok", "model": fit_complexity(algorithm_timings),
+                                "predicted_s": None})
 
         if SHOW_SORTED:
             print("  Sorted list: "+str(sorted_list) )
 
-        # Now on to "Divide and Conquer" sorting algorithms:
-
-        task_name = "Insertion sort"
-        strt_time = timeit.default_timer()
-        sorted_list = insertion_sort(my_list)
-        report_elap_time(cur_batch, task_name, timeit.default_timer() - strt_time)
-
-        task_name = "Quicksort"
-        strt_time = timeit.default_timer()
-        sorted_list = quicksort(my_list)
-        report_elap_time(cur_batch, task_name, timeit.default_timer() - strt_time)
-
-        task_name = "Merge sort"
-        strt_time = timeit.default_timer()
-        sorted_list = merge_sort(my_list)
-        report_elap_time(cur_batch, task_name, timeit.default_timer() - strt_time)
-
-        task_name = "MTM sort"
-        strt_time = timeit.default_timer()
-        sorted_list = multi_threaded_merge_sort(my_list, num_threads=4)
-        report_elap_time(cur_batch, task_name, timeit.default_timer() - strt_time)
-
-        # TODO: Add Selection sort, Counting sort, heapsort, etc.?
+        # TODO: Add Selection sort, etc.?
         # TODO: Add run using NVIDIA GPU for multi-processing merge?
 
         cur_batch += 1
         print("")
 
-    if SHOW_PLOTS:
+    shutdown_process_pool()
+
+    settings = {"batches": num_of_batches, "algorithms": args.algorithms, "budget": args.budget,
+                "memory": args.memory,
+                "distributions": args.distribution, "seed": seed, "swaps": args.swaps,
+                "warmup": args.warmup, "repeat": args.repeat, "processes": args.processes}
+    if args.json:
+        write_results_json(args.json, results, settings)
+        print(f"*** Results written to {args.json}")
+    if args.csv:
+        write_results_csv(args.csv, results)
+        print(f"*** Results written to {args.csv}")
+    regressions = []
+    if args.compare:
+        regressions = compare_to_baseline(results, args.compare, args.threshold)
+
+    if SHOW_PLOTS and results:
         # Display results of runs to plot using Matplotlib or Seaborn.
-        x = np.array(batches_array)
-        #plot_multiple_lines(results_x, bubble_sort_results, merge_sort_results, quicksort_results, mtm_sort_results)
-        plot_joint_seaborn(results_x, bubble_sort_results, merge_sort_results, quicksort_results, mtm_sort_results)
+        #plot_multiple_lines(results)
+        plot_joint_seaborn(results)
 
+    if regressions:
+        sys.exit(1)
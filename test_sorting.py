@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+
+"""test_sorting.py: tests of sorting.py run as a command, the way it is used.
+
+At https://github.com/wilsonmar/python-samples/blob/main/test_sorting.py
+
+USAGE:
+    python -m pytest -q test_sorting.py
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+SORTING_PY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sorting.py")
+
+
+@pytest.mark.parametrize("algorithm", ["mp", "sample"])
+def test_memory_subprocess_with_process_pool(algorithm):
+    """--memory subprocess finishes for sorts that use the cached process pool."""
+    result = subprocess.run(
+        [sys.executable, SORTING_PY, "-b", "10", "--no-plot", "-p", "2", "-a", algorithm,
+         "--memory", "subprocess", "-v", "--seed", "1"],
+        capture_output=True, text=True, timeout=120, check=False)
+    assert result.returncode == 0, result.stderr
+    assert "peak:" in result.stdout